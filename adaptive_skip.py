@@ -0,0 +1,135 @@
+"""
+Bộ điều khiển vòng kín cho việc bỏ qua frame: đo chi phí nhận diện và mức độ hoạt động
+của cảnh để chọn khoảng cách giữa hai lần nhận diện và kích thước input nhằm giữ FPS mục tiêu
+"""
+import json
+import math
+import time
+from config import (ADAPTIVE_INPUT_SIZES, ADAPTIVE_MAX_INTERVAL, ADAPTIVE_ACTIVE_MAX_INTERVAL,
+    ADAPTIVE_MOTION_THRESHOLD, ADAPTIVE_ACTIVE_DETECTIONS)
+
+class AdaptiveSkipController:
+    """
+    Mỗi frame xử lý với chi phí `overhead` (đọc, vẽ, ghi), mỗi lần nhận diện tốn thêm `cost`.
+    Với khoảng cách `interval`, FPS đạt được xấp xỉ interval / (cost + interval * overhead),
+    nên interval cần thiết là cost / (1 / target_fps - overhead).
+
+    Khi cảnh đang hoạt động (nhiều chuyển động hoặc nhiều đối tượng), interval bị giới hạn ở
+    mức nhỏ và bộ điều khiển giảm kích thước input thay vì bỏ qua nhiều frame; khi cảnh yên
+    tĩnh thì ưu tiên giữ độ phân giải cao và bỏ qua nhiều frame hơn.
+    """
+    def __init__(self, target_fps, input_sizes=ADAPTIVE_INPUT_SIZES, max_interval=ADAPTIVE_MAX_INTERVAL,
+                 active_max_interval=ADAPTIVE_ACTIVE_MAX_INTERVAL, motion_threshold=ADAPTIVE_MOTION_THRESHOLD,
+                 active_detections=ADAPTIVE_ACTIVE_DETECTIONS, smoothing=0.3, hold=5, log_path=None):
+        self.target_fps = target_fps
+        self.input_sizes = sorted(input_sizes or [], reverse=True)
+        self.max_interval = max_interval
+        self.active_max_interval = active_max_interval
+        self.motion_threshold = motion_threshold
+        self.active_detections = active_detections
+        self.smoothing = smoothing
+        self.hold = hold
+
+        self.interval = 1
+        self.input_size = self.input_sizes[0] if self.input_sizes else None
+        self.costs = {}
+        self.overhead = 0.0
+        self.last_detection = None
+        self.detections_since_change = 0
+        self.prev_small = None
+        self.last_tick = None
+        self.decisions = 0
+        self.log = open(log_path, "a") if log_path else None
+
+    def _ema(self, old, new):
+        return new if old is None else (1 - self.smoothing) * old + self.smoothing * new
+
+    def should_detect(self, frame_index):
+        """
+        Frame này có cần chạy nhận diện không
+        """
+        return self.last_detection is None or frame_index - self.last_detection >= self.interval
+
+    def frame_done(self, inference_time=0.0):
+        """
+        Gọi cuối mỗi frame để đo chi phí ngoài nhận diện (đọc, vẽ, ghi frame)
+        """
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            self.overhead = self._ema(self.overhead, max(now - self.last_tick - inference_time, 0.0))
+        self.last_tick = now
+
+    def measure_motion(self, frame):
+        """
+        Mức độ chuyển động (0..1) so với lần nhận diện trước, tính trên ảnh xám thu nhỏ
+        """
+        import cv2
+        small = cv2.cvtColor(cv2.resize(frame, (64, 36)), cv2.COLOR_BGR2GRAY)
+        motion = 0.0 if self.prev_small is None else float(cv2.absdiff(small, self.prev_small).mean()) / 255
+        self.prev_small = small
+        return motion
+
+    def _estimated_cost(self, size):
+        if size in self.costs:
+            return self.costs[size]
+        # Chưa đo ở kích thước này: ước lượng theo tỉ lệ diện tích từ kích thước đã đo gần nhất
+        known = min(self.costs, key=lambda s: abs(s - size))
+        return self.costs[known] * (size / known) ** 2
+
+    def update(self, frame_index, frame, inference_time, num_detections):
+        """
+        Cập nhật sau mỗi lần nhận diện và quyết định interval / kích thước input tiếp theo
+        """
+        self.last_detection = frame_index
+        self.detections_since_change += 1
+        self.costs[self.input_size] = self._ema(self.costs.get(self.input_size), inference_time)
+        motion = self.measure_motion(frame)
+        active = motion >= self.motion_threshold or num_detections >= self.active_detections
+        cap = self.active_max_interval if active else self.max_interval
+
+        budget = 1.0 / self.target_fps - self.overhead
+        sizes = self.input_sizes or [None]
+        if self.detections_since_change < self.hold:
+            # Giữ nguyên kích thước một thời gian để tránh dao động
+            sizes = [self.input_size]
+
+        # Chọn kích thước lớn nhất mà interval cần thiết vẫn nằm trong giới hạn
+        reason = "target unreachable"
+        choice = (sizes[-1], cap)
+        for size in sizes:
+            cost = self._estimated_cost(size)
+            needed = max(1, math.ceil(cost / budget)) if budget > 0 else math.inf
+            if needed <= cap:
+                choice = (size, needed)
+                reason = "within target"
+                break
+
+        size, interval = choice
+        if size != self.input_size:
+            self.detections_since_change = 0
+        changed = (size, interval) != (self.input_size, self.interval)
+        self.input_size, self.interval = size, interval
+        self.decisions += 1
+
+        decision = {
+            "frame": frame_index,
+            "inference_ms": inference_time * 1000,
+            "overhead_ms": self.overhead * 1000,
+            "motion": motion,
+            "detections": num_detections,
+            "active": active,
+            "interval": interval,
+            "input_size": size,
+            "reason": reason,
+        }
+        if self.log is not None:
+            self.log.write(json.dumps(decision) + "\n")
+        if changed:
+            print(f"[INFO] adaptive: frame {frame_index} -> detect every {interval} frames"
+                  + (f" at {size}x{size}" if size else "")
+                  + f" ({'active' if active else 'quiet'} scene, {reason})")
+        return decision
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
@@ -1,24 +1,22 @@
 import os
 import sys
 import subprocess
+from importlib.util import find_spec
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QLabel, 
                              QVBoxLayout, QHBoxLayout, QWidget, QGroupBox, 
                              QLineEdit, QFileDialog, QMessageBox, QTabWidget,
                              QComboBox, QSlider, QSpinBox, QDoubleSpinBox)
-from PyQt5.QtGui import QPixmap, QImage, QFont, QIcon
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-import os
+from PyQt5.QtCore import Qt
 os.environ["QT_LOGGING_RULES"] = "qt.qpa.fonts.warning=false"
 
 class RequirementsChecker:
     @staticmethod
     def check_requirements():
-        try:
-            import cv2
-            import numpy as np
-            import imutils
-        except ImportError as e:
-            error_msg = f"Thiếu thư viện: {e}\n\n"
+        # Chỉ kiểm tra thư viện có được cài đặt hay không, không import thật
+        # (GUI chạy nhận diện qua subprocess nên không cần cv2/numpy trong tiến trình này)
+        missing_modules = [name for name in ("cv2", "numpy", "imutils") if find_spec(name) is None]
+        if missing_modules:
+            error_msg = f"Thiếu thư viện: {', '.join(missing_modules)}\n\n"
             error_msg += "Vui lòng cài đặt các thư viện cần thiết bằng lệnh:\n"
             error_msg += "pip install opencv-python numpy imutils PyQt5"
             QMessageBox.critical(None, "Lỗi Thư Viện", error_msg)
@@ -128,6 +126,17 @@ class ImageDetectionTab(QWidget):
         thresh_layout.addWidget(self.thresh_slider)
         thresh_layout.addWidget(self.thresh_spin)
         
+        model_layout = QHBoxLayout()
+        model_label = QLabel("Model:")
+        self.model_combo = QComboBox()
+        self.model_combo.addItem("YOLOv3 (chính xác)", "yolo")
+        self.model_combo.addItem("MobileNet SSD (nhanh)", "mobilenet")
+        self.model_combo.addItem("Cascade (SSD trước, YOLOv3 khi không chắc chắn)", "cascade")
+        
+        model_layout.addWidget(model_label)
+        model_layout.addWidget(self.model_combo)
+        
+        params_layout.addLayout(model_layout)
         params_layout.addLayout(conf_layout)
         params_layout.addLayout(thresh_layout)
         params_group.setLayout(params_layout)
@@ -171,9 +180,10 @@ class ImageDetectionTab(QWidget):
         threshold = self.thresh_spin.value()
         output_path = self.output_path.text().strip()
         
+        model = self.model_combo.currentData()
         output_arg = f"-o {output_path}" if output_path else ""
         
-        command = f"python image_detection.py -i {input_path} -c {confidence} -t {threshold} {output_arg}"
+        command = f"python image_detection.py -i {input_path} -m {model} -c {confidence} -t {threshold} {output_arg}"
         try:
             subprocess.run(command, shell=True, check=True)
             QMessageBox.information(self, "Thành Công", "Nhận diện đối tượng đã hoàn tất!")
@@ -259,6 +269,17 @@ class VideoDetectionTab(QWidget):
         thresh_layout.addWidget(self.thresh_slider)
         thresh_layout.addWidget(self.thresh_spin)
         
+        model_layout = QHBoxLayout()
+        model_label = QLabel("Model:")
+        self.model_combo = QComboBox()
+        self.model_combo.addItem("YOLOv3 (chính xác)", "yolo")
+        self.model_combo.addItem("MobileNet SSD (nhanh)", "mobilenet")
+        self.model_combo.addItem("Cascade (SSD trước, YOLOv3 khi không chắc chắn)", "cascade")
+        
+        model_layout.addWidget(model_label)
+        model_layout.addWidget(self.model_combo)
+        
+        params_layout.addLayout(model_layout)
         params_layout.addLayout(conf_layout)
         params_layout.addLayout(thresh_layout)
         params_group.setLayout(params_layout)
@@ -336,13 +357,14 @@ class VideoDetectionTab(QWidget):
         threshold = self.thresh_spin.value()
         fps = self.fps_spin.value()
         skip_frames = self.skip_spin.value()
+        model = self.model_combo.currentData()
         
         QMessageBox.information(self, "Bắt Đầu Xử Lý", 
             "Quá trình nhận diện đối tượng trong video sẽ bắt đầu. "
             "Điều này có thể mất nhiều thời gian tùy thuộc vào độ dài của video.\n\n"
             "Bạn sẽ được thông báo khi quá trình hoàn tất.")
         
-        command = f"python video_detection.py -i {input_path} -o {output_path} -c {confidence} -t {threshold} -f {fps} -s {skip_frames}"
+        command = f"python video_detection.py -i {input_path} -o {output_path} -m {model} -c {confidence} -t {threshold} -f {fps} -s {skip_frames}"
         try:
             subprocess.run(command, shell=True, check=True)
             QMessageBox.information(self, "Thành Công", f"Nhận diện đối tượng đã hoàn tất!\n\nKết quả đã được lưu tại: {output_path}")
@@ -429,6 +451,17 @@ class RealtimeDetectionTab(QWidget):
         thresh_layout.addWidget(self.thresh_slider)
         thresh_layout.addWidget(self.thresh_spin)
         
+        model_layout = QHBoxLayout()
+        model_label = QLabel("Model:")
+        self.model_combo = QComboBox()
+        self.model_combo.addItem("YOLOv3 (chính xác)", "yolo")
+        self.model_combo.addItem("MobileNet SSD (nhanh)", "mobilenet")
+        self.model_combo.addItem("Cascade (SSD trước, YOLOv3 khi không chắc chắn)", "cascade")
+        
+        model_layout.addWidget(model_label)
+        model_layout.addWidget(self.model_combo)
+        
+        params_layout.addLayout(model_layout)
         params_layout.addLayout(conf_layout)
         params_layout.addLayout(thresh_layout)
         params_group.setLayout(params_layout)
@@ -453,12 +486,13 @@ class RealtimeDetectionTab(QWidget):
         confidence = self.conf_spin.value()
         threshold = self.thresh_spin.value()
         width = self.width_spin.value()
+        model = self.model_combo.currentData()
         
         QMessageBox.information(self, "Bắt Đầu Nhận Diện", 
             "Cửa sổ nhận diện trực tiếp sẽ được mở.\n"
             "Nhấn phím 'q' để đóng cửa sổ và dừng nhận diện.")
         
-        command = f"python real_time_detection.py -s {source} -c {confidence} -t {threshold} -w {width}"
+        command = f"python real_time_detection.py -s {source} -m {model} -c {confidence} -t {threshold} -w {width}"
         subprocess.Popen(command, shell=True)
 
 
@@ -1,8 +1,8 @@
 """
 Cấu hình chung cho hệ thống nhận diện đối tượng
 """
-import numpy as np
 import os
+from functools import lru_cache
 
 # Đường dẫn tới thư mục YOLO
 YOLO_PATH = "yolo-coco"
@@ -12,12 +12,30 @@ LABELS_PATH = os.path.join(YOLO_PATH, "coco.names")
 WEIGHTS_PATH = os.path.join(YOLO_PATH, "yolov3.weights")
 CONFIG_PATH = os.path.join(YOLO_PATH, "yolov3.cfg")
 
-# Đọc nhãn từ file
-LABELS = open(LABELS_PATH).read().strip().split("\n")
+@lru_cache(maxsize=None)
+def get_labels():
+    """
+    Đọc nhãn từ file (chỉ đọc một lần, ở lần gọi đầu tiên)
+    """
+    with open(LABELS_PATH) as f:
+        return f.read().strip().split("\n")
 
-# Thiết lập màu sắc cho các class
-np.random.seed(42)
-COLORS = np.random.randint(0, 255, size=(len(LABELS), 3), dtype="uint8")
+@lru_cache(maxsize=None)
+def get_colors():
+    """
+    Thiết lập màu sắc cho các class (chỉ tạo một lần, ở lần gọi đầu tiên)
+    """
+    import numpy as np
+    np.random.seed(42)
+    return np.random.randint(0, 255, size=(len(get_labels()), 3), dtype="uint8")
+
+def __getattr__(name):
+    # Giữ tương thích với `from config import LABELS, COLORS`
+    if name == "LABELS":
+        return get_labels()
+    if name == "COLORS":
+        return get_colors()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Các cài đặt mặc định
 DEFAULT_CONFIDENCE = 0.5
@@ -33,4 +51,64 @@ MOBILENET_CLASSES = ["background", "aeroplane", "bicycle", "bird", "boat",
 
 # MobileNet SSD model paths
 MOBILENET_PROTOTXT = "MobileNetSSD_deploy.prototxt.txt"
-MOBILENET_MODEL = "MobileNetSSD_deploy.caffemodel"
\ No newline at end of file
+MOBILENET_MODEL = "MobileNetSSD_deploy.caffemodel"
+
+# Model mặc định và ngưỡng leo thang cho chế độ cascade
+DEFAULT_MODEL = "yolo"
+MOBILENET_CONFIDENCE_FLOOR = 0.2
+CASCADE_ESCALATE_CONFIDENCE = 0.6
+# Chuyển sang YOLO cả khi SSD không phát hiện gì (cảnh chỉ có lớp COCO ngoài 20 lớp VOC)
+CASCADE_ESCALATE_EMPTY = True
+
+# Ngân sách thời gian import khi chạy `image_detection.py --help` (mili giây)
+STARTUP_IMPORT_BUDGET_MS = 100
+
+# Cài đặt HTTP server nhận diện (detection_server.py)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8080
+BATCH_WINDOW_MS = 10
+MAX_BATCH_SIZE = 8
+MAX_QUEUE_DEPTH = 64
+MAX_CONNECTIONS = 128
+
+# Số frame giữa hai checkpoint khi tiếp tục job video bằng --resume mà không chỉ định --checkpoint-every
+DEFAULT_CHECKPOINT_EVERY = 1000
+
+# Các biến thể model nhẹ hơn cho máy chỉ có CPU (xem model_variants.py)
+MODEL_VARIANTS = {
+    "full": {"format": "darknet", "config": CONFIG_PATH, "weights": WEIGHTS_PATH, "input_size": 416},
+    "tiny": {"format": "darknet", "config": os.path.join(YOLO_PATH, "yolov3-tiny.cfg"),
+        "weights": os.path.join(YOLO_PATH, "yolov3-tiny.weights"), "input_size": 416},
+    "reduced": {"format": "darknet", "config": CONFIG_PATH, "weights": WEIGHTS_PATH, "input_size": 320},
+    "int8": {"format": "onnx", "model": os.path.join(YOLO_PATH, "yolov3-int8.onnx"), "input_size": 416},
+}
+
+# Mức giảm mAP@0.5 tối đa (tuyệt đối) so với model đầy đủ để một biến thể được chấp nhận
+MAP_DROP_TOLERANCE = 0.05
+VARIANT_GATE_PATH = os.path.join(YOLO_PATH, "variant_gate.json")
+
+# Bộ điều khiển bỏ qua frame thích ứng (adaptive_skip.py)
+ADAPTIVE_INPUT_SIZES = [416, 352, 320, 256]
+ADAPTIVE_MAX_INTERVAL = 10
+ADAPTIVE_ACTIVE_MAX_INTERVAL = 2
+ADAPTIVE_MOTION_THRESHOLD = 0.02
+ADAPTIVE_ACTIVE_DETECTIONS = 5
+REALTIME_TARGET_FPS = 15
+
+# Chế độ streaming giới hạn bộ nhớ (streaming.py, soak_test.py)
+STREAM_POOL_SIZE = 4
+MEMORY_SAMPLE_EVERY = 1000
+SOAK_FRAMES = 1000000
+SOAK_WARMUP_FRAMES = 10000
+SOAK_MAX_RSS_GROWTH_MB = 16
+SOAK_MAX_TRACED_GROWTH_MB = 1
+
+# Gộp kết quả theo thời gian thành sự kiện theo từng đối tượng (events.py)
+EVENT_IOU_THRESHOLD = 0.3
+EVENT_MAX_MISSED = 5
+EVENT_MIN_HITS = 2
+EVENT_BOX_SMOOTHING = 0.5
+
+# Pool tiến trình dùng shared memory (shm_pool.py, shm_benchmark.py)
+SHM_SLOTS_PER_WORKER = 2
+SHM_MAX_DETECTIONS = 256
@@ -0,0 +1,274 @@
+"""
+HTTP server (asyncio) cung cấp nhận diện đối tượng YOLOv3 cho các dịch vụ khác
+
+Các request upload ảnh được gom trong một cửa sổ thời gian ngắn thành một batch để chạy
+một lần forward pass. Hàng đợi có giới hạn: khi đầy, request bị từ chối ngay với mã 503
+(load shedding) thay vì làm tăng độ trễ của mọi request khác.
+
+Endpoint:
+    POST /detect   body là ảnh đã mã hoá (jpg, png...), trả về JSON danh sách đối tượng
+    GET  /metrics  thống kê độ trễ, batch và số request bị từ chối
+    GET  /health   kiểm tra server còn sống
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import (CONFIG_PATH, WEIGHTS_PATH, DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD,
+    SERVER_HOST, SERVER_PORT, BATCH_WINDOW_MS, MAX_BATCH_SIZE, MAX_QUEUE_DEPTH, MAX_CONNECTIONS)
+from evaluation import summarize_latencies
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    500: "Internal Server Error", 503: "Service Unavailable"}
+
+# Giới hạn kích thước ảnh upload (byte)
+MAX_BODY_SIZE = 20 * 1024 * 1024
+
+class Metrics:
+    """Thống kê độ trễ từng request và kích thước batch"""
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.completed = 0
+        self.shed = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_images = 0
+        self.started = time.time()
+
+    def snapshot(self):
+        uptime = time.time() - self.started
+        return {
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "completed": self.completed,
+            "shed": self.shed,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_images / self.batches if self.batches else 0.0,
+            # Chỉ tính các request trả về 200, không tính request bị từ chối (503) hay lỗi
+            "throughput_rps": self.completed / uptime if uptime > 0 else 0.0,
+            "latency": summarize_latencies(list(self.latencies)),
+        }
+
+
+class MicroBatcher:
+    """
+    Gom các ảnh đang chờ thành batch và chạy YOLO trên một thread riêng.
+
+    Model cv2.dnn không an toàn khi dùng đồng thời nên chỉ có một thread inference;
+    event loop vẫn tiếp tục nhận request trong lúc batch đang chạy.
+    """
+    def __init__(self, net, ln, metrics, batch_window=BATCH_WINDOW_MS / 1000,
+                 max_batch_size=MAX_BATCH_SIZE, max_queue_depth=MAX_QUEUE_DEPTH,
+                 confidence_threshold=DEFAULT_CONFIDENCE, nms_threshold=DEFAULT_THRESHOLD):
+        self.net = net
+        self.ln = ln
+        self.metrics = metrics
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.confidence_threshold = confidence_threshold
+        self.nms_threshold = nms_threshold
+        self.queue = asyncio.Queue(maxsize=max_queue_depth)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def submit(self, image):
+        """
+        Đưa ảnh vào hàng đợi, trả về future chứa kết quả.
+        Ném asyncio.QueueFull nếu hàng đợi đã đầy.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((image, future))
+        return future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Chờ ảnh đầu tiên, sau đó gom thêm trong cửa sổ thời gian
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            images = [image for image, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self._infer, images)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.metrics.batches += 1
+            self.metrics.batched_images += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _infer(self, images):
+        from detection_utils import detect_objects_yolo_batch
+        return detect_objects_yolo_batch(self.net, self.ln, images,
+            confidence_threshold=self.confidence_threshold,
+            nms_threshold=self.nms_threshold)
+
+
+class DetectionServer:
+    """HTTP/1.1 tối giản (keep-alive, Content-Length) trên asyncio.start_server"""
+    def __init__(self, batcher, metrics, max_connections=MAX_CONNECTIONS):
+        self.batcher = batcher
+        self.metrics = metrics
+        self.connections = asyncio.Semaphore(max_connections)
+
+    async def handle_connection(self, reader, writer):
+        async with self.connections:
+            try:
+                while True:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    status, payload = await self._dispatch(method, path, body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    self._write_response(writer, status, payload, keep_alive)
+                    await writer.drain()
+                    if not keep_alive:
+                        break
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                pass
+            finally:
+                writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_SIZE:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], headers, body
+
+    async def _dispatch(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, self.metrics.snapshot()
+        if path != "/detect":
+            return 404, {"error": "not found"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        return await self._detect(body)
+
+    async def _detect(self, body):
+        import cv2
+        import numpy as np
+
+        start = time.perf_counter()
+        self.metrics.requests += 1
+
+        # Giải mã ảnh ngoài event loop (cv2 nhả GIL) để không chặn các kết nối khác
+        image = await asyncio.get_running_loop().run_in_executor(
+            None, cv2.imdecode, np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            self.metrics.errors += 1
+            return 400, {"error": "could not decode image"}
+
+        try:
+            future = self.batcher.submit(image)
+        except asyncio.QueueFull:
+            self.metrics.shed += 1
+            return 503, {"error": "server overloaded, retry later"}
+
+        try:
+            results = await future
+        except Exception as e:
+            self.metrics.errors += 1
+            return 500, {"error": str(e)}
+
+        latency = time.perf_counter() - start
+        self.metrics.completed += 1
+        self.metrics.latencies.append(latency)
+        return 200, {"latency_ms": latency * 1000, "objects": results}
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+
+async def serve(args):
+    from detection_utils import load_yolo_model
+
+    net, ln = load_yolo_model(args["config"], args["weights"])
+    metrics = Metrics()
+    batcher = MicroBatcher(net, ln, metrics,
+        batch_window=args["batch_window"] / 1000,
+        max_batch_size=args["max_batch"],
+        max_queue_depth=args["max_queue"],
+        confidence_threshold=args["confidence"],
+        nms_threshold=args["threshold"])
+    server = DetectionServer(batcher, metrics, max_connections=args["max_connections"])
+
+    batch_task = asyncio.create_task(batcher.run())
+    srv = await asyncio.start_server(server.handle_connection, args["host"], args["port"])
+    print(f"[INFO] serving on http://{args['host']}:{args['port']} (POST /detect, GET /metrics)")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        batch_task.cancel()
+        print(f"[INFO] final metrics: {json.dumps(metrics.snapshot())}")
+
+def main():
+    # Xử lý tham số dòng lệnh
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", type=str, default=SERVER_HOST,
+        help="address to listen on")
+    ap.add_argument("-p", "--port", type=int, default=SERVER_PORT,
+        help="port to listen on")
+    ap.add_argument("-c", "--confidence", type=float, default=DEFAULT_CONFIDENCE,
+        help="minimum probability to filter weak detections")
+    ap.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="threshold when applying non-maxima suppression")
+    ap.add_argument("--batch-window", type=float, default=BATCH_WINDOW_MS,
+        help="milliseconds to wait for more requests before running a batch")
+    ap.add_argument("--max-batch", type=int, default=MAX_BATCH_SIZE,
+        help="maximum number of images in one forward pass")
+    ap.add_argument("--max-queue", type=int, default=MAX_QUEUE_DEPTH,
+        help="maximum queued images before requests are rejected with 503")
+    ap.add_argument("--max-connections", type=int, default=MAX_CONNECTIONS,
+        help="maximum concurrently served connections")
+    ap.add_argument("--config", type=str, default=CONFIG_PATH,
+        help="path to YOLO config file")
+    ap.add_argument("--weights", type=str, default=WEIGHTS_PATH,
+        help="path to YOLO weights file")
+    args = vars(ap.parse_args())
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("[INFO] shutting down...")
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ Module chung cho việc nhận diện đối tượng, có thể sử dụng l
 import cv2
 import numpy as np
 import time
-from config import LABELS, COLORS, DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD
+from config import get_labels, get_colors, DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD, DEFAULT_WIDTH, DEFAULT_HEIGHT
 
 def load_yolo_model(config_path, weights_path):
     """
@@ -21,6 +21,14 @@ def load_yolo_model(config_path, weights_path):
         ln = [ln[i[0] - 1] for i in net.getUnconnectedOutLayers()]
     return net, ln
 
+def load_onnx_model(model_path):
+    """
+    Tải model YOLO đã export sang ONNX (ví dụ bản lượng tử hoá int8) từ disk
+    """
+    print("[INFO] loading ONNX model from disk...")
+    net = cv2.dnn.readNetFromONNX(model_path)
+    return net, list(net.getUnconnectedOutLayersNames())
+
 def load_mobilenet_model(prototxt_path, model_path):
     """
     Tải model MobileNet SSD từ disk
@@ -28,7 +36,7 @@ def load_mobilenet_model(prototxt_path, model_path):
     print("[INFO] loading MobileNet SSD model...")
     return cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
 
-def create_yolo_blob(image, width=416, height=416):
+def create_yolo_blob(image, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
     """
     Tạo blob từ ảnh đầu vào cho model YOLO
     """
@@ -42,61 +50,131 @@ def create_mobilenet_blob(image, width=300, height=300):
     return cv2.dnn.blobFromImage(cv2.resize(image, (width, height)),
         0.007843, (width, height), 127.5)
 
-def detect_objects_yolo(net, ln, image, confidence_threshold=DEFAULT_CONFIDENCE, nms_threshold=DEFAULT_THRESHOLD):
+def decode_yolo_outputs(layer_outputs, W, H, confidence_threshold=DEFAULT_CONFIDENCE, nms_threshold=DEFAULT_THRESHOLD,
+                        roi_filter=None, offset=(0, 0), frame_size=None):
     """
-    Thực hiện nhận diện đối tượng bằng YOLO trên một ảnh
+    Giải mã output của các layer YOLO (cho một ảnh kích thước W x H) thành danh sách kết quả
+
+    Nếu có roi_filter, chỉ các cột score của lớp cho phép được giải mã và các box có tâm
+    nằm ngoài ROI bị loại trước NMS. Box chỉ được giữ khi lớp có score cao nhất trên mọi lớp
+    nằm trong danh sách cho phép, nên kết quả giống với việc lọc lớp sau khi nhận diện (trừ việc
+    box của lớp bị loại không còn tham gia NMS). `offset` là vị trí của ảnh (khi đã crop) trong frame
+    gốc có kích thước `frame_size` (W, H).
     """
-    (H, W) = image.shape[:2]
+    detections = np.vstack([output.reshape(-1, output.shape[-1]) for output in layer_outputs])
     
-    # Tạo blob và forward pass
-    blob = create_yolo_blob(image)
-    net.setInput(blob)
-    start = time.time()
-    layer_outputs = net.forward(ln)
-    end = time.time()
+    # Chỉ lấy các cột score cần thiết
+    columns = roi_filter.score_columns() if roi_filter is not None else None
+    scores = detections[:, 5:] if columns is None else detections[:, columns]
+    best = np.argmax(scores, axis=1)
+    confidences = scores[np.arange(len(scores)), best]
     
-    print(f"[INFO] YOLO took {end - start:.6f} seconds")
+    keep = confidences > confidence_threshold
+    if columns is not None:
+        # Bỏ box mà lớp ngoài danh sách có score cao hơn (ví dụ "truck" không được báo thành "car");
+        # chỉ kiểm tra các hàng đã qua ngưỡng nên vẫn tránh được việc giải mã toàn bộ các cột
+        rows = np.nonzero(keep)[0]
+        keep[rows] = confidences[rows] >= detections[rows, 5:].max(axis=1)
+    detections = detections[keep]
+    confidences = confidences[keep]
+    classIDs = best[keep] if columns is None else roi_filter.class_ids[best[keep]]
     
-    # Khởi tạo danh sách kết quả
-    boxes = []
-    confidences = []
-    classIDs = []
-    
-    # Xử lý kết quả từ các layer output
-    for output in layer_outputs:
-        for detection in output:
-            scores = detection[5:]
-            classID = np.argmax(scores)
-            confidence = scores[classID]
-            
-            if confidence > confidence_threshold:
-                box = detection[0:4] * np.array([W, H, W, H])
-                (centerX, centerY, width, height) = box.astype("int")
-                
-                x = int(centerX - (width / 2))
-                y = int(centerY - (height / 2))
-                
-                boxes.append([x, y, int(width), int(height)])
-                confidences.append(float(confidence))
-                classIDs.append(classID)
+    # Chuyển (centerX, centerY, width, height) tương đối sang (x, y, w, h) trong frame gốc
+    box = (detections[:, 0:4] * np.array([W, H, W, H])).astype("int")
+    centerX = box[:, 0] + offset[0]
+    centerY = box[:, 1] + offset[1]
+    x = (centerX - box[:, 2] / 2).astype("int")
+    y = (centerY - box[:, 3] / 2).astype("int")
+    boxes = np.stack([x, y, box[:, 2], box[:, 3]], axis=1)
+    
+    # Loại các box nằm ngoài ROI trước NMS
+    if roi_filter is not None:
+        (frame_W, frame_H) = frame_size or (W, H)
+        inside = roi_filter.in_roi(centerX, centerY, frame_W, frame_H)
+        boxes = boxes[inside]
+        confidences = confidences[inside]
+        classIDs = classIDs[inside]
+    
+    boxes = boxes.tolist()
+    confidences = confidences.astype(float).tolist()
+    classIDs = classIDs.tolist()
     
     # Áp dụng non-maxima suppression
     idxs = cv2.dnn.NMSBoxes(boxes, confidences, confidence_threshold, nms_threshold)
     
+    labels = get_labels()
     results = []
     if len(idxs) > 0:
-        for i in idxs.flatten():
+        for i in np.array(idxs).flatten():
             x, y = boxes[i][0], boxes[i][1]
             w, h = boxes[i][2], boxes[i][3]
             results.append({
                 "class_id": classIDs[i],
-                "label": LABELS[classIDs[i]],
+                "label": labels[classIDs[i]],
                 "confidence": confidences[i],
                 "box": (x, y, w, h)
             })
     
     return results
 
+def detect_objects_yolo(net, ln, image, confidence_threshold=DEFAULT_CONFIDENCE, nms_threshold=DEFAULT_THRESHOLD,
+                        roi_filter=None, input_size=(DEFAULT_WIDTH, DEFAULT_HEIGHT)):
+    """
+    Thực hiện nhận diện đối tượng bằng YOLO trên một ảnh
+    """
+    (frame_H, frame_W) = image.shape[:2]
+    offset = (0, 0)
+    if roi_filter is not None:
+        image, offset = roi_filter.crop_image(image)
+    (H, W) = image.shape[:2]
+    
+    # Tạo blob và forward pass
+    blob = create_yolo_blob(image, *input_size)
+    net.setInput(blob)
+    start = time.time()
+    layer_outputs = net.forward(ln)
+    end = time.time()
+    
+    print(f"[INFO] YOLO took {end - start:.6f} seconds")
+    
+    return decode_yolo_outputs(layer_outputs, W, H, confidence_threshold, nms_threshold,
+        roi_filter=roi_filter, offset=offset, frame_size=(frame_W, frame_H))
+
+def detect_objects_yolo_batch(net, ln, images, confidence_threshold=DEFAULT_CONFIDENCE, nms_threshold=DEFAULT_THRESHOLD,
+                              roi_filter=None, input_size=(DEFAULT_WIDTH, DEFAULT_HEIGHT)):
+    """
+    Nhận diện đối tượng bằng YOLO trên nhiều ảnh với một lần forward pass duy nhất
+    """
+    frame_sizes = [(image.shape[1], image.shape[0]) for image in images]
+    offsets = [(0, 0)] * len(images)
+    if roi_filter is not None:
+        images, offsets = zip(*[roi_filter.crop_image(image) for image in images])
+    
+    blob = cv2.dnn.blobFromImages(images, 1 / 255.0, tuple(input_size),
+        swapRB=True, crop=False)
+    net.setInput(blob)
+    start = time.time()
+    layer_outputs = net.forward(ln)
+    end = time.time()
+    
+    print(f"[INFO] YOLO took {end - start:.6f} seconds for a batch of {len(images)} images")
+    
+    # Với batch > 1, OpenCV trả về output dạng (batch, rows, 85); một số phiên bản
+    # trả về (batch * rows, 85) nên cần chia lại theo từng ảnh
+    per_image = [
+        output if output.ndim == 3 else np.split(output, len(images))
+        for output in layer_outputs
+    ]
+    
+    batch_results = []
+    for i, image in enumerate(images):
+        (H, W) = image.shape[:2]
+        outputs = [output[i] for output in per_image]
+        batch_results.append(decode_yolo_outputs(outputs, W, H, confidence_threshold, nms_threshold,
+            roi_filter=roi_filter, offset=offsets[i], frame_size=frame_sizes[i]))
+    
+    return batch_results
+
 def detect_objects_mobilenet(net, image, confidence_threshold=0.2):
     """
     Thực hiện nhận diện đối tượng bằng MobileNet SSD trên một ảnh
@@ -117,15 +195,16 @@ def detect_objects_mobilenet(net, image, confidence_threshold=0.2):
             box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
             (startX, startY, endX, endY) = box.astype("int")
             
-            # Chuyển đổi từ (startX, startY, endX, endY) sang (x, y, w, h)
-            x, y = startX, startY
-            w, h = endX - startX, endY - startY
+            # Chuyển đổi từ (startX, startY, endX, endY) sang (x, y, w, h); dùng tên riêng
+            # cho kích thước box để không ghi đè kích thước frame (w, h) dùng cho box tiếp theo
+            x, y = int(startX), int(startY)
+            bw, bh = int(endX - startX), int(endY - startY)
             
             results.append({
                 "class_id": idx,
                 "label": MOBILENET_CLASSES[idx],
-                "confidence": confidence,
-                "box": (x, y, w, h)
+                "confidence": float(confidence),
+                "box": (x, y, bw, bh)
             })
     
     return results
@@ -134,6 +213,7 @@ def draw_predictions(image, results):
     """
     Vẽ kết quả nhận diện lên ảnh
     """
+    colors = get_colors()
     for result in results:
         # Lấy thông tin từ kết quả
         label = result["label"]
@@ -142,7 +222,7 @@ def draw_predictions(image, results):
         class_id = result["class_id"]
         
         # Vẽ hộp giới hạn và nhãn
-        color = [int(c) for c in COLORS[class_id]]
+        color = [int(c) for c in colors[class_id]]
         cv2.rectangle(image, (x, y), (x + w, y + h), color, 2)
         text = "{}: {:.4f}".format(label, confidence)
         y_pos = y - 5 if y - 5 > 15 else y + 15
@@ -0,0 +1,207 @@
+"""
+Giao diện chung cho các bộ nhận diện (YOLO, MobileNet SSD, cascade) và registry chọn model theo tên
+
+detection_utils (cv2, numpy) chỉ được import khi tải model, nên có thể import module này
+để lấy danh sách model (ví dụ cho `--help`) mà không tốn thời gian khởi động.
+"""
+import time
+from config import (CONFIG_PATH, WEIGHTS_PATH, MOBILENET_PROTOTXT, MOBILENET_MODEL,
+    DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD, DEFAULT_WIDTH, DEFAULT_HEIGHT,
+    MOBILENET_CLASSES, MOBILENET_CONFIDENCE_FLOOR, CASCADE_ESCALATE_CONFIDENCE, CASCADE_ESCALATE_EMPTY)
+
+# Registry: tên model -> lớp Detector
+DETECTORS = {}
+
+def register_detector(name):
+    """
+    Decorator đăng ký một lớp Detector vào registry dưới tên `name`
+    """
+    def decorator(cls):
+        cls.name = name
+        DETECTORS[name] = cls
+        return cls
+    return decorator
+
+def create_detector(name, **kwargs):
+    """
+    Tạo detector theo tên đã đăng ký và tải model
+    """
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown detector '{name}', choose from: {', '.join(sorted(DETECTORS))}")
+    detector = DETECTORS[name](**kwargs)
+    detector.load()
+    return detector
+
+
+class Detector:
+    """Lớp cơ sở cho mọi bộ nhận diện, tự đo thời gian để báo cáo throughput"""
+    name = None
+
+    def __init__(self, confidence_threshold=DEFAULT_CONFIDENCE, nms_threshold=DEFAULT_THRESHOLD):
+        self.confidence_threshold = confidence_threshold
+        self.nms_threshold = nms_threshold
+        self.frames = 0
+        self.total_time = 0.0
+
+    def load(self):
+        raise NotImplementedError
+
+    def _detect(self, image):
+        raise NotImplementedError
+
+    def detect(self, image):
+        """
+        Nhận diện đối tượng trên một ảnh, trả về danh sách kết quả như detect_objects_yolo
+        """
+        start = time.time()
+        results = self._detect(image)
+        self.total_time += time.time() - start
+        self.frames += 1
+        return results
+
+    def throughput(self):
+        """
+        Số frame xử lý được mỗi giây (chỉ tính thời gian nhận diện)
+        """
+        return self.frames / self.total_time if self.total_time > 0 else 0.0
+
+    def report(self):
+        """
+        In thống kê throughput của detector
+        """
+        print(f"[INFO] [{self.name}] {self.frames} frames in {self.total_time:.2f} seconds "
+              f"({self.throughput():.2f} FPS)")
+
+
+@register_detector("yolo")
+class YoloDetector(Detector):
+    """YOLOv3: chậm hơn nhưng chính xác hơn, 80 lớp COCO"""
+    def __init__(self, config_path=CONFIG_PATH, weights_path=WEIGHTS_PATH, roi_filter=None, **kwargs):
+        super().__init__(**kwargs)
+        self.config_path = config_path
+        self.weights_path = weights_path
+        self.roi_filter = roi_filter
+        self.input_size = (DEFAULT_WIDTH, DEFAULT_HEIGHT)
+        self.net = None
+        self.ln = None
+
+    def load(self):
+        from detection_utils import load_yolo_model
+        self.net, self.ln = load_yolo_model(self.config_path, self.weights_path)
+
+    def _detect(self, image):
+        from detection_utils import detect_objects_yolo
+        return detect_objects_yolo(
+            self.net, self.ln, image,
+            confidence_threshold=self.confidence_threshold,
+            nms_threshold=self.nms_threshold,
+            roi_filter=self.roi_filter,
+            input_size=self.input_size
+        )
+
+    def report(self):
+        super().report()
+        if self.roi_filter is not None:
+            self.roi_filter.report()
+
+
+class YoloVariantDetector(YoloDetector):
+    """Biến thể nhẹ hơn của YOLOv3, tải qua model_variants (bị từ chối nếu không qua cổng mAP)"""
+    variant = None
+
+    def load(self):
+        from model_variants import load_model_variant
+        self.net, self.ln, self.input_size = load_model_variant(self.variant)
+
+
+@register_detector("yolo-tiny")
+class YoloTinyDetector(YoloVariantDetector):
+    """YOLOv3-tiny: nhanh hơn nhiều trên CPU, kém chính xác hơn"""
+    variant = "tiny"
+
+
+@register_detector("yolo-reduced")
+class YoloReducedDetector(YoloVariantDetector):
+    """YOLOv3 với input 320x320 thay vì 416x416"""
+    variant = "reduced"
+
+
+@register_detector("yolo-int8")
+class YoloInt8Detector(YoloVariantDetector):
+    """YOLOv3 lượng tử hoá int8 (ONNX, tạo bằng export_variant.py)"""
+    variant = "int8"
+
+
+@register_detector("mobilenet")
+class MobileNetDetector(Detector):
+    """
+    MobileNet SSD: nhanh, 20 lớp VOC. class_id và nhãn được ánh xạ sang lớp COCO tương ứng
+    (cả 20 lớp VOC đều có trong coco.names) để mọi detector trả kết quả trong cùng một không gian lớp.
+    """
+    def __init__(self, prototxt_path=MOBILENET_PROTOTXT, model_path=MOBILENET_MODEL, **kwargs):
+        super().__init__(**kwargs)
+        self.prototxt_path = prototxt_path
+        self.model_path = model_path
+        self.net = None
+        self.coco_ids = None
+
+    def load(self):
+        from config import get_labels
+        from detection_utils import load_mobilenet_model
+        self.net = load_mobilenet_model(self.prototxt_path, self.model_path)
+        labels = get_labels()
+        self.coco_ids = {i: labels.index(name) for i, name in enumerate(MOBILENET_CLASSES) if name in labels}
+
+    def _detect(self, image):
+        from config import get_labels
+        from detection_utils import detect_objects_mobilenet
+        labels = get_labels()
+        results = []
+        for r in detect_objects_mobilenet(self.net, image, confidence_threshold=self.confidence_threshold):
+            # Bỏ lớp "background" (không có trong COCO)
+            if r["class_id"] not in self.coco_ids:
+                continue
+            class_id = self.coco_ids[r["class_id"]]
+            results.append(dict(r, class_id=class_id, label=labels[class_id]))
+        return results
+
+
+@register_detector("cascade")
+class CascadeDetector(Detector):
+    """
+    Chạy MobileNet SSD trước, chỉ chuyển frame sang YOLOv3 khi kết quả SSD có độ tin cậy thấp.
+
+    SSD được chạy với ngưỡng sàn thấp; nếu có phát hiện nằm giữa ngưỡng sàn và
+    `escalate_confidence` thì frame được coi là không chắc chắn và được nhận diện lại bằng YOLO.
+    Khi SSD không thấy gì, frame cũng được chuyển sang YOLO nếu `escalate_empty` bật, vì cảnh có
+    thể chỉ chứa các lớp COCO mà VOC không có (xe tải, đèn giao thông...). Cả hai nhánh đều trả
+    class_id theo COCO.
+    """
+    def __init__(self, escalate_confidence=CASCADE_ESCALATE_CONFIDENCE,
+                 floor_confidence=MOBILENET_CONFIDENCE_FLOOR, escalate_empty=CASCADE_ESCALATE_EMPTY, **kwargs):
+        super().__init__(**kwargs)
+        self.escalate_confidence = escalate_confidence
+        self.escalate_empty = escalate_empty
+        self.fast = MobileNetDetector(confidence_threshold=floor_confidence)
+        self.accurate = YoloDetector(**kwargs)
+        self.escalations = 0
+
+    def load(self):
+        self.fast.load()
+        self.accurate.load()
+
+    def _detect(self, image):
+        results = self.fast.detect(image)
+        uncertain = any(r["confidence"] < self.escalate_confidence for r in results)
+        if uncertain or (self.escalate_empty and not results):
+            self.escalations += 1
+            return self.accurate.detect(image)
+        return [r for r in results if r["confidence"] > self.confidence_threshold]
+
+    def report(self):
+        super().report()
+        self.fast.report()
+        self.accurate.report()
+        if self.frames > 0:
+            rate = self.escalations / self.frames * 100
+            print(f"[INFO] [{self.name}] escalated {self.escalations}/{self.frames} frames to YOLO ({rate:.1f}%)")
@@ -0,0 +1,177 @@
+"""
+Đánh giá độ chính xác (mAP) và độ trễ trên một tập dữ liệu có annotation dạng COCO
+
+Ảnh được nhận diện song song bởi nhiều tiến trình worker, mỗi worker tải model một lần.
+Kết quả gồm mAP@0.5, mAP@0.5:0.95 và phân bố độ trễ nhận diện, để mỗi thay đổi về tốc độ
+được đánh giá trên cả hai trục.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from config import DEFAULT_THRESHOLD, DEFAULT_MODEL
+from detectors import DETECTORS
+
+# Tên lớp trong coco.names khác với tên category trong annotation COCO chính thức
+COCO_NAME_ALIASES = {
+    "motorcycle": "motorbike",
+    "airplane": "aeroplane",
+    "couch": "sofa",
+    "potted plant": "pottedplant",
+    "dining table": "diningtable",
+    "tv": "tvmonitor",
+}
+
+IOU_THRESHOLDS = [0.5 + 0.05 * i for i in range(10)]
+
+def load_coco_annotations(annotations_path, labels):
+    """
+    Đọc file annotation COCO, trả về (danh sách (image_id, file_name), dict image_id -> ground truth).
+    Category được ánh xạ sang chỉ số lớp của coco.names theo tên; annotation "iscrowd" được giữ lại
+    với cờ "iscrowd" để evaluate_detections coi là vùng bỏ qua.
+    """
+    with open(annotations_path) as f:
+        coco = json.load(f)
+
+    category_map = {}
+    for category in coco.get("categories", []):
+        name = COCO_NAME_ALIASES.get(category["name"], category["name"])
+        if name in labels:
+            category_map[category["id"]] = labels.index(name)
+        else:
+            print(f"[WARNING] category '{category['name']}' is not a model class, ignoring it")
+
+    images = [(image["id"], image["file_name"]) for image in coco["images"]]
+    ground_truths = {image_id: [] for image_id, _ in images}
+    for ann in coco.get("annotations", []):
+        if ann["category_id"] not in category_map:
+            continue
+        if ann["image_id"] in ground_truths:
+            ground_truths[ann["image_id"]].append({
+                "class_id": category_map[ann["category_id"]],
+                "box": tuple(ann["bbox"]),
+                "iscrowd": bool(ann.get("iscrowd", 0))
+            })
+    return images, ground_truths
+
+# Detector của từng worker (khởi tạo một lần trong _init_worker)
+_detector = None
+_init_error = None
+
+def _init_worker(model, confidence, threshold, threads):
+    global _detector, _init_error
+    # Không để exception thoát khỏi initializer: Pool sẽ khởi động lại worker mãi mãi.
+    # Lỗi được giữ lại và báo về tiến trình chính ở task đầu tiên.
+    try:
+        import cv2
+        from detectors import create_detector
+
+        # Chia số luồng CPU giữa các worker để tránh tranh chấp
+        cv2.setNumThreads(threads)
+        _detector = create_detector(model, confidence_threshold=confidence, nms_threshold=threshold)
+    except Exception:
+        _init_error = traceback.format_exc()
+
+def _detect_image(task):
+    import cv2
+
+    if _init_error is not None:
+        raise RuntimeError(f"worker failed to load the model:\n{_init_error}")
+    image_id, path = task
+    image = cv2.imread(path)
+    if image is None:
+        return image_id, None, 0.0
+    start = time.perf_counter()
+    results = _detector.detect(image)
+    latency = time.perf_counter() - start
+    # Chỉ trả về các trường cần cho mAP để giảm chi phí truyền giữa tiến trình
+    compact = [{"class_id": int(r["class_id"]), "confidence": float(r["confidence"]),
+                "box": tuple(int(v) for v in r["box"])} for r in results]
+    return image_id, compact, latency
+
+def main():
+    # Xử lý tham số dòng lệnh
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-a", "--annotations", required=True,
+        help="path to COCO-format annotations JSON")
+    ap.add_argument("-i", "--images", required=True,
+        help="directory containing the annotated images")
+    ap.add_argument("-m", "--model", type=str, default=DEFAULT_MODEL,
+        choices=sorted(DETECTORS),
+        help="detection model to evaluate (classes a model cannot detect score AP 0)")
+    ap.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+        help="number of parallel worker processes")
+    ap.add_argument("-n", "--limit", type=int,
+        help="evaluate only the first N images")
+    ap.add_argument("-c", "--confidence", type=float, default=0.01,
+        help="confidence threshold used when collecting detections for mAP")
+    ap.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="threshold when applying non-maxima suppression")
+    ap.add_argument("-o", "--output", type=str,
+        help="optional path to write the report as JSON")
+    args = vars(ap.parse_args())
+
+    from multiprocessing import Pool
+    from config import get_labels
+    from evaluation import evaluate_detections, summarize_latencies
+
+    images, ground_truths = load_coco_annotations(args["annotations"], get_labels())
+    if args["limit"]:
+        images = images[:args["limit"]]
+    tasks = [(image_id, os.path.join(args["images"], name)) for image_id, name in images]
+
+    workers = max(1, min(args["workers"], len(tasks)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"[INFO] evaluating {args['model']} on {len(tasks)} images with {workers} workers...")
+
+    predictions, latencies, missing = {}, [], []
+    start = time.time()
+    with Pool(workers, initializer=_init_worker,
+              initargs=(args["model"], args["confidence"], args["threshold"], threads)) as pool:
+        try:
+            for image_id, results, latency in pool.imap_unordered(_detect_image, tasks, chunksize=4):
+                if results is None:
+                    missing.append(image_id)
+                    continue
+                predictions[image_id] = results
+                latencies.append(latency)
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+    elapsed = time.time() - start
+
+    if missing:
+        print(f"[WARNING] could not read {len(missing)} images, they are excluded")
+    image_ids = [image_id for image_id, _ in images if image_id in predictions]
+    maps = evaluate_detections([predictions[i] for i in image_ids],
+        [ground_truths[i] for i in image_ids], IOU_THRESHOLDS)
+    map50 = maps[IOU_THRESHOLDS[0]]
+    map50_95 = sum(maps.values()) / len(maps)
+    latency = summarize_latencies(latencies)
+
+    print(f"[INFO] mAP@0.5: {map50:.4f}")
+    print(f"[INFO] mAP@0.5:0.95: {map50_95:.4f}")
+    if latency["count"]:
+        print("[INFO] latency per image: mean {mean_ms:.1f} ms, p50 {p50_ms:.1f} ms, "
+              "p95 {p95_ms:.1f} ms, p99 {p99_ms:.1f} ms, max {max_ms:.1f} ms".format(**latency))
+    print(f"[INFO] throughput: {len(image_ids) / elapsed:.2f} images/s ({elapsed:.1f} seconds total)")
+
+    if args["output"]:
+        report = {
+            "model": args["model"],
+            "images": len(image_ids),
+            "workers": workers,
+            "map50": map50,
+            "map50_95": map50_95,
+            "map_per_iou": {f"{iou:.2f}": value for iou, value in maps.items()},
+            "latency": latency,
+            "throughput_ips": len(image_ids) / elapsed if elapsed > 0 else 0.0,
+        }
+        with open(args["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] report saved to {args['output']}")
+
+if __name__ == "__main__":
+    main()
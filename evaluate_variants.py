@@ -0,0 +1,129 @@
+"""
+So sánh các biến thể model với YOLOv3 đầy đủ trên một tập ảnh có nhãn cục bộ
+
+Tập mẫu là một thư mục ảnh, mỗi ảnh có file nhãn cùng tên dạng YOLO (.txt), mỗi dòng:
+    <class_id> <center_x> <center_y> <width> <height>
+với toạ độ chuẩn hoá về [0, 1]. Biến thể có mAP@0.5 giảm quá ngưỡng cho phép bị từ chối:
+kết quả được ghi vào VARIANT_GATE_PATH và model_variants sẽ không tải biến thể đó.
+"""
+import argparse
+import os
+import sys
+import time
+from config import MODEL_VARIANTS, MAP_DROP_TOLERANCE, DEFAULT_THRESHOLD
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def load_samples(samples_dir):
+    """
+    Đọc ảnh và nhãn dạng YOLO, trả về (danh sách ảnh, danh sách ground truth)
+    """
+    import cv2
+
+    images, ground_truths = [], []
+    for name in sorted(os.listdir(samples_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image = cv2.imread(os.path.join(samples_dir, name))
+        if image is None:
+            print(f"[WARNING] could not read {name}, skipping")
+            continue
+        (H, W) = image.shape[:2]
+
+        gts = []
+        label_path = os.path.join(samples_dir, os.path.splitext(name)[0] + ".txt")
+        if os.path.exists(label_path):
+            with open(label_path) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) != 5:
+                        continue
+                    class_id = int(parts[0])
+                    cx, cy, w, h = (float(v) for v in parts[1:])
+                    gts.append({
+                        "class_id": class_id,
+                        "box": ((cx - w / 2) * W, (cy - h / 2) * H, w * W, h * H)
+                    })
+        images.append(image)
+        ground_truths.append(gts)
+    return images, ground_truths
+
+def run_variant(name, images, confidence, threshold):
+    """
+    Chạy một biến thể trên toàn bộ ảnh, trả về (kết quả từng ảnh, thời gian trung bình mỗi ảnh)
+    """
+    from detection_utils import detect_objects_yolo
+    from model_variants import load_model_variant
+
+    net, ln, input_size = load_model_variant(name, enforce_gate=False)
+    predictions = []
+    start = time.time()
+    for image in images:
+        predictions.append(detect_objects_yolo(net, ln, image,
+            confidence_threshold=confidence, nms_threshold=threshold, input_size=input_size))
+    return predictions, (time.time() - start) / max(len(images), 1)
+
+def main():
+    # Xử lý tham số dòng lệnh
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-s", "--samples", required=True,
+        help="directory of labelled sample images (YOLO .txt labels)")
+    ap.add_argument("-v", "--variants", type=str,
+        default=",".join(name for name in MODEL_VARIANTS if name != "full"),
+        help="comma-separated variants to evaluate against the full model")
+    ap.add_argument("--tolerance", type=float, default=MAP_DROP_TOLERANCE,
+        help="maximum allowed absolute mAP@0.5 drop")
+    ap.add_argument("-c", "--confidence", type=float, default=0.01,
+        help="confidence threshold used when collecting detections for mAP")
+    ap.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="threshold when applying non-maxima suppression")
+    args = vars(ap.parse_args())
+
+    from evaluation import evaluate_detections
+    from model_variants import load_gate, save_gate
+
+    variants = [v.strip() for v in args["variants"].split(",") if v.strip()]
+    unknown = [v for v in variants if v not in MODEL_VARIANTS]
+    if unknown:
+        ap.error(f"unknown variants: {', '.join(unknown)}")
+
+    images, ground_truths = load_samples(args["samples"])
+    if not images:
+        print(f"[ERROR] no sample images found in {args['samples']}")
+        sys.exit(1)
+    print(f"[INFO] evaluating on {len(images)} labelled images...")
+
+    predictions, full_time = run_variant("full", images, args["confidence"], args["threshold"])
+    full_map = evaluate_detections(predictions, ground_truths)[0.5]
+    print(f"[INFO] full: mAP@0.5 {full_map:.4f}, {full_time * 1000:.1f} ms/image")
+
+    gate = load_gate()
+    rejected = []
+    for name in variants:
+        predictions, variant_time = run_variant(name, images, args["confidence"], args["threshold"])
+        variant_map = evaluate_detections(predictions, ground_truths)[0.5]
+        drop = full_map - variant_map
+        accepted = drop <= args["tolerance"]
+        gate[name] = {
+            "map50": variant_map,
+            "full_map50": full_map,
+            "map_drop": drop,
+            "tolerance": args["tolerance"],
+            "accepted": accepted,
+            "ms_per_image": variant_time * 1000,
+            "speedup": full_time / variant_time if variant_time > 0 else 0.0,
+            "samples": len(images),
+        }
+        status = "ACCEPTED" if accepted else "REJECTED"
+        print(f"[INFO] {name}: mAP@0.5 {variant_map:.4f} (drop {drop:+.4f}), "
+              f"{variant_time * 1000:.1f} ms/image ({gate[name]['speedup']:.2f}x) -> {status}")
+        if not accepted:
+            rejected.append(name)
+
+    save_gate(gate)
+    if rejected:
+        print(f"[ERROR] variants beyond the mAP tolerance: {', '.join(rejected)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
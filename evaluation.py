@@ -0,0 +1,139 @@
+"""
+Tính mAP cho kết quả nhận diện (IoU và ghép cặp được vector hoá bằng numpy) và thống kê độ trễ
+
+Box ở dạng (x, y, w, h) theo pixel, giống "box" trong kết quả của detect_objects_yolo.
+"""
+import numpy as np
+
+def box_iou(boxes_a, boxes_b, crowd=False):
+    """
+    Ma trận IoU (N x M) giữa hai tập box dạng (x, y, w, h).
+    Với crowd=True (boxes_b là vùng crowd), mẫu số là diện tích box của boxes_a như trong COCO.
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+
+    inter_w = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    inter_h = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = inter_w * inter_h
+    if crowd:
+        union = np.broadcast_to(a[:, 2:3] * a[:, 3:4], inter.shape)
+    else:
+        union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-12), 0.0)
+
+def match_detections(pred_boxes, gt_boxes, iou_thresholds, crowd_boxes=()):
+    """
+    Ghép cặp tham lam các box dự đoán (đã sắp xếp theo độ tin cậy giảm dần) với ground truth
+    của cùng một ảnh, cho mọi ngưỡng IoU cùng lúc.
+    Trả về (tp, ignored): hai mảng bool (len(iou_thresholds) x N). Box không khớp ground truth
+    thường nào nhưng trùng một vùng crowd được đánh dấu ignored (không phải true positive
+    cũng không phải false positive), giống cách COCO xử lý annotation "iscrowd".
+    """
+    iou_thresholds = np.asarray(iou_thresholds)
+    tp = np.zeros((len(iou_thresholds), len(pred_boxes)), dtype=bool)
+    ignored = np.zeros_like(tp)
+    if len(pred_boxes) == 0:
+        return tp, ignored
+
+    if len(gt_boxes) > 0:
+        ious = box_iou(pred_boxes, gt_boxes)
+        matched = np.zeros((len(iou_thresholds), len(gt_boxes)), dtype=bool)
+        for i in range(len(pred_boxes)):
+            # IoU của box i với các ground truth chưa được ghép, cho từng ngưỡng
+            candidates = np.where(matched, -1.0, ious[i])
+            best = candidates.argmax(axis=1)
+            best_iou = candidates[np.arange(len(iou_thresholds)), best]
+            hit = best_iou >= iou_thresholds
+            tp[hit, i] = True
+            matched[np.nonzero(hit)[0], best[hit]] = True
+
+    if len(crowd_boxes) > 0:
+        # Một vùng crowd có thể "khớp" với nhiều box dự đoán
+        crowd_iou = box_iou(pred_boxes, crowd_boxes, crowd=True).max(axis=1)
+        ignored = (crowd_iou[None, :] >= iou_thresholds[:, None]) & ~tp
+    return tp, ignored
+
+def average_precision(tp, scores, num_gt):
+    """
+    AP nội suy 101 điểm (kiểu COCO) từ các cờ true positive và độ tin cậy tương ứng
+    """
+    if num_gt == 0:
+        return float("nan")
+    if len(scores) == 0:
+        return 0.0
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    tp = np.asarray(tp)[order]
+    tp_cum = np.cumsum(tp)
+    fp_cum = np.cumsum(~tp)
+    recall = tp_cum / num_gt
+    precision = tp_cum / np.maximum(tp_cum + fp_cum, 1)
+
+    # Precision đơn điệu giảm theo recall
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    recall_points = np.linspace(0, 1, 101)
+    idx = np.searchsorted(recall, recall_points, side="left")
+    interpolated = np.where(idx < len(precision), precision[np.minimum(idx, len(precision) - 1)], 0.0)
+    return float(interpolated.mean())
+
+def evaluate_detections(predictions, ground_truths, iou_thresholds=(0.5,), max_detections=100):
+    """
+    Tính mAP cho từng ngưỡng IoU theo quy tắc của COCO.
+
+    predictions: mỗi ảnh một danh sách kết quả {"class_id", "confidence", "box"}
+    ground_truths: mỗi ảnh một danh sách {"class_id", "box"}, thêm "iscrowd": True cho vùng crowd
+    Vùng crowd không được tính vào số ground truth; box dự đoán trùng với chúng bị bỏ qua.
+    Mỗi ảnh chỉ giữ `max_detections` box có độ tin cậy cao nhất của mỗi lớp (maxDets của COCO).
+    Trả về dict {ngưỡng IoU: mAP}, trung bình trên các lớp có ground truth.
+    """
+    iou_thresholds = tuple(iou_thresholds)
+    matches_by_class, gt_count = {}, {}
+
+    for preds, gts in zip(predictions, ground_truths):
+        classes = {p["class_id"] for p in preds} | {g["class_id"] for g in gts}
+        for c in classes:
+            class_preds = sorted((p for p in preds if p["class_id"] == c),
+                key=lambda p: -p["confidence"])[:max_detections]
+            class_gts = [g["box"] for g in gts if g["class_id"] == c and not g.get("iscrowd")]
+            crowd = [g["box"] for g in gts if g["class_id"] == c and g.get("iscrowd")]
+            tp, ignored = match_detections([p["box"] for p in class_preds], class_gts,
+                iou_thresholds, crowd)
+            scores = np.array([p["confidence"] for p in class_preds], dtype=np.float64)
+
+            matches_by_class.setdefault(c, []).append((tp, ignored, scores))
+            gt_count[c] = gt_count.get(c, 0) + len(class_gts)
+
+    results = {}
+    for t, iou in enumerate(iou_thresholds):
+        aps = []
+        for c, matches in matches_by_class.items():
+            if gt_count[c] == 0:
+                continue
+            class_tp = np.concatenate([tp[t][~ignored[t]] for tp, ignored, _ in matches])
+            class_scores = np.concatenate([scores[~ignored[t]] for _, ignored, scores in matches])
+            aps.append(average_precision(class_tp, class_scores, gt_count[c]))
+        results[iou] = float(np.mean(aps)) if aps else 0.0
+    return results
+
+def summarize_latencies(latencies):
+    """
+    Tính các phân vị độ trễ (ms) từ danh sách độ trễ tính bằng giây
+    """
+    if not latencies:
+        return {"count": 0}
+    values = sorted(latencies)
+    def pct(p):
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] * 1000
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": values[-1] * 1000,
+    }
@@ -0,0 +1,218 @@
+"""
+Gộp kết quả nhận diện theo từng frame thành sự kiện theo từng đối tượng
+
+Các phát hiện liên tiếp của cùng một đối tượng (cùng lớp, IoU đủ lớn) được gộp thành một track
+với box được làm mượt và độ tin cậy cao nhất. Chỉ các thay đổi trạng thái được phát ra:
+"enter" khi track được xác nhận và "exit" khi đối tượng biến mất, thay vì một bản ghi mỗi frame.
+"""
+import json
+import os
+import numpy as np
+from config import EVENT_IOU_THRESHOLD, EVENT_MAX_MISSED, EVENT_MIN_HITS, EVENT_BOX_SMOOTHING
+from evaluation import box_iou
+
+class Track:
+    """Một đối tượng được theo dõi qua nhiều frame"""
+    def __init__(self, track_id, result, timestamp):
+        self.track_id = track_id
+        self.class_id = result["class_id"]
+        self.label = result["label"]
+        self.box = np.array(result["box"], dtype=np.float64)
+        self.peak_confidence = float(result["confidence"])
+        self.enter_time = timestamp
+        self.last_seen = timestamp
+        self.hits = 1
+        self.missed = 0
+        self.confirmed = False
+
+    def update(self, result, timestamp, smoothing):
+        self.box = (1 - smoothing) * self.box + smoothing * np.asarray(result["box"], dtype=np.float64)
+        self.peak_confidence = max(self.peak_confidence, float(result["confidence"]))
+        self.last_seen = timestamp
+        self.hits += 1
+        self.missed = 0
+
+    def to_event(self, event_type, timestamp):
+        event = {
+            "event": event_type,
+            "track_id": self.track_id,
+            "class_id": self.class_id,
+            "label": self.label,
+            "time": timestamp,
+            "enter_time": self.enter_time,
+            "box": [int(round(v)) for v in self.box],
+            "peak_confidence": self.peak_confidence,
+        }
+        if event_type == "exit":
+            event["exit_time"] = self.last_seen
+            event["duration"] = self.last_seen - self.enter_time
+            event["detections"] = self.hits
+        return event
+
+    def state(self):
+        """
+        Trạng thái dạng JSON để lưu vào checkpoint
+        """
+        return {
+            "track_id": self.track_id, "class_id": self.class_id, "label": self.label,
+            "box": self.box.tolist(), "peak_confidence": self.peak_confidence,
+            "enter_time": self.enter_time, "last_seen": self.last_seen,
+            "hits": self.hits, "missed": self.missed, "confirmed": self.confirmed,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        track = cls.__new__(cls)
+        track.__dict__.update(state)
+        track.box = np.array(state["box"], dtype=np.float64)
+        return track
+
+
+class EventTracker:
+    """
+    Gộp kết quả theo thời gian. Gọi update() sau mỗi lần nhận diện, flush() khi kết thúc.
+    """
+    def __init__(self, iou_threshold=EVENT_IOU_THRESHOLD, max_missed=EVENT_MAX_MISSED,
+                 min_hits=EVENT_MIN_HITS, smoothing=EVENT_BOX_SMOOTHING):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.smoothing = smoothing
+        self.tracks = []
+        self.next_id = 1
+        self.raw_detections = 0
+        self.events_emitted = 0
+
+    def _match(self, results):
+        """
+        Ghép tham lam kết quả với track cùng lớp theo IoU giảm dần, trả về list (track, result)
+        và danh sách kết quả chưa được ghép
+        """
+        if not self.tracks or not results:
+            return [], list(results)
+
+        ious = box_iou([r["box"] for r in results], [t.box for t in self.tracks])
+        same_class = (np.array([r["class_id"] for r in results])[:, None]
+                      == np.array([t.class_id for t in self.tracks])[None, :])
+        ious = np.where(same_class, ious, 0.0)
+
+        matches = []
+        used_results, used_tracks = set(), set()
+        for flat in np.argsort(-ious, axis=None):
+            r, t = np.unravel_index(flat, ious.shape)
+            if ious[r, t] < self.iou_threshold:
+                break
+            if r in used_results or t in used_tracks:
+                continue
+            used_results.add(r)
+            used_tracks.add(t)
+            matches.append((self.tracks[t], results[r]))
+        unmatched = [result for i, result in enumerate(results) if i not in used_results]
+        return matches, unmatched
+
+    def update(self, results, timestamp):
+        """
+        Cập nhật với kết quả của một lần nhận diện, trả về danh sách sự kiện mới phát sinh
+        """
+        self.raw_detections += len(results)
+        events = []
+
+        matches, unmatched = self._match(results)
+        matched_tracks = set()
+        for track, result in matches:
+            track.update(result, timestamp, self.smoothing)
+            matched_tracks.add(track.track_id)
+            if not track.confirmed and track.hits >= self.min_hits:
+                track.confirmed = True
+                events.append(track.to_event("enter", timestamp))
+
+        # Track không được ghép: tăng số lần bỏ lỡ, phát "exit" khi vượt ngưỡng
+        alive = []
+        for track in self.tracks:
+            if track.track_id not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    if track.confirmed:
+                        events.append(track.to_event("exit", timestamp))
+                    continue
+            alive.append(track)
+        self.tracks = alive
+
+        for result in unmatched:
+            track = Track(self.next_id, result, timestamp)
+            self.next_id += 1
+            if self.min_hits <= 1:
+                track.confirmed = True
+                events.append(track.to_event("enter", timestamp))
+            self.tracks.append(track)
+
+        self.events_emitted += len(events)
+        return events
+
+    def flush(self, timestamp):
+        """
+        Kết thúc tất cả track đang mở (cuối video / khi dừng), trả về các sự kiện "exit"
+        """
+        events = [track.to_event("exit", timestamp) for track in self.tracks if track.confirmed]
+        self.tracks = []
+        self.events_emitted += len(events)
+        return events
+
+    def state(self):
+        """
+        Trạng thái của tracker (các track đang mở, id tiếp theo, thống kê) để lưu vào checkpoint
+        """
+        return {
+            "tracks": [track.state() for track in self.tracks],
+            "next_id": self.next_id,
+            "raw_detections": self.raw_detections,
+            "events_emitted": self.events_emitted,
+        }
+
+    def restore(self, state):
+        """
+        Khôi phục trạng thái đã lưu bằng state() khi tiếp tục job từ checkpoint
+        """
+        self.tracks = [Track.from_state(track) for track in state["tracks"]]
+        self.next_id = state["next_id"]
+        self.raw_detections = state["raw_detections"]
+        self.events_emitted = state["events_emitted"]
+
+    def report(self):
+        """
+        In tỉ lệ giảm khối lượng output so với ghi từng phát hiện
+        """
+        ratio = self.raw_detections / self.events_emitted if self.events_emitted else float("inf")
+        print(f"[INFO] [events] {self.raw_detections} per-frame detections -> "
+              f"{self.events_emitted} events ({ratio:.1f}x fewer records)")
+
+
+class EventWriter:
+    """
+    Ghi sự kiện ra file JSONL. Mặc định ghi nối tiếp; với `offset` (khi tiếp tục từ checkpoint)
+    file được cắt về offset đó để bỏ các sự kiện ghi sau checkpoint cuối cùng.
+    """
+    def __init__(self, path, offset=None):
+        if offset is None:
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "r+b" if os.path.exists(path) else "wb")
+            self.file.truncate(offset)
+            self.file.seek(offset)
+
+    def write(self, events):
+        for event in events:
+            self.file.write((json.dumps(event) + "\n").encode("utf-8"))
+        if events:
+            self.file.flush()
+
+    def sync(self):
+        """
+        Đẩy dữ liệu xuống đĩa, trả về offset hiện tại để lưu vào checkpoint
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,79 @@
+"""
+Tạo biến thể int8 của YOLOv3 bằng lượng tử hoá tĩnh (onnxruntime) từ một model ONNX fp32
+
+OpenCV không có đường int8 cho weights Darknet, vì vậy cần export yolov3 sang ONNX fp32 trước
+(output dạng (N, 85) giống layer YOLO của Darknet) rồi chạy script này với một thư mục ảnh
+hiệu chuẩn. Model int8 được ghi vào đường dẫn của biến thể "int8" trong config.MODEL_VARIANTS,
+sau đó cần chạy evaluate_variants.py để kiểm tra mức giảm mAP trước khi sử dụng.
+"""
+import argparse
+import os
+import sys
+from config import MODEL_VARIANTS
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def main():
+    # Xử lý tham số dòng lệnh
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-i", "--input", required=True,
+        help="path to the fp32 YOLOv3 ONNX model")
+    ap.add_argument("-o", "--output", type=str, default=MODEL_VARIANTS["int8"]["model"],
+        help="path to the int8 ONNX model to write")
+    ap.add_argument("-c", "--calibration", required=True,
+        help="directory of representative images used to calibrate activation ranges")
+    ap.add_argument("-n", "--num-images", type=int, default=100,
+        help="maximum number of calibration images")
+    ap.add_argument("-s", "--input-size", type=int, default=MODEL_VARIANTS["int8"]["input_size"],
+        help="network input width/height")
+    args = vars(ap.parse_args())
+
+    try:
+        import onnxruntime
+        from onnxruntime.quantization import (quantize_static, CalibrationDataReader,
+            QuantFormat, QuantType)
+    except ImportError:
+        print("[ERROR] onnxruntime is required for int8 export: pip install onnxruntime")
+        sys.exit(1)
+
+    import cv2
+    from detection_utils import create_yolo_blob
+
+    image_paths = sorted(
+        os.path.join(args["calibration"], name) for name in os.listdir(args["calibration"])
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )[:args["num_images"]]
+    if not image_paths:
+        print(f"[ERROR] no calibration images found in {args['calibration']}")
+        sys.exit(1)
+
+    input_name = onnxruntime.InferenceSession(args["input"],
+        providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class YoloCalibrationReader(CalibrationDataReader):
+        """Cung cấp blob của từng ảnh hiệu chuẩn cho onnxruntime"""
+        def __init__(self):
+            self.paths = iter(image_paths)
+
+        def get_next(self):
+            for path in self.paths:
+                image = cv2.imread(path)
+                if image is None:
+                    continue
+                blob = create_yolo_blob(image, args["input_size"], args["input_size"])
+                return {input_name: blob}
+            return None
+
+    # Định dạng QOperator (QLinearConv...) là định dạng cv2.dnn đọc được
+    print(f"[INFO] calibrating with {len(image_paths)} images and quantizing to int8...")
+    quantize_static(args["input"], args["output"], YoloCalibrationReader(),
+        quant_format=QuantFormat.QOperator, per_channel=True,
+        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+
+    size_in = os.path.getsize(args["input"]) / 1024 / 1024
+    size_out = os.path.getsize(args["output"]) / 1024 / 1024
+    print(f"[INFO] int8 model saved to {args['output']} ({size_in:.1f} MB -> {size_out:.1f} MB)")
+    print("[INFO] run evaluate_variants.py -v int8 to check the accuracy drop before using it")
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,8 @@
 Chương trình nhận diện đối tượng từ ảnh sử dụng YOLOv3
 """
 import argparse
-import cv2
-from config import CONFIG_PATH, WEIGHTS_PATH, DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD
-from detection_utils import load_yolo_model, detect_objects_yolo, draw_predictions
+from config import DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD, DEFAULT_MODEL
+from detectors import DETECTORS, create_detector
 
 def main():
     # Xử lý tham số dòng lệnh
@@ -17,10 +16,34 @@ def main():
         help="threshold when applying non-maxima suppression")
     ap.add_argument("-o", "--output", type=str,
         help="path to optional output image file")
+    ap.add_argument("-m", "--model", type=str, default=DEFAULT_MODEL,
+        choices=sorted(DETECTORS), help="detection model to use")
+    ap.add_argument("--roi", type=str,
+        help="path to ROI JSON file (polygons and optional classes), yolo models only")
+    ap.add_argument("--classes", type=str,
+        help="comma-separated class names or ids to detect, e.g. person,car (yolo models only)")
+    ap.add_argument("--crop-roi", action="store_true",
+        help="run inference only on the bounding rect of the ROI polygons")
     args = vars(ap.parse_args())
+    if (args["roi"] or args["classes"]) and not args["model"].startswith("yolo"):
+        ap.error("--roi/--classes are only supported with the yolo models")
+
+    # Import thư viện nặng sau khi parse tham số để `--help` khởi động nhanh
+    import cv2
+    from detection_utils import draw_predictions
+    from roi_filter import load_roi_filter
 
     # Tải model
-    net, ln = load_yolo_model(CONFIG_PATH, WEIGHTS_PATH)
+    detector_kwargs = {}
+    roi_filter = load_roi_filter(args["roi"], args["classes"], args["crop_roi"])
+    if roi_filter is not None:
+        detector_kwargs["roi_filter"] = roi_filter
+    detector = create_detector(
+        args["model"],
+        confidence_threshold=args["confidence"],
+        nms_threshold=args["threshold"],
+        **detector_kwargs
+    )
 
     # Đọc ảnh đầu vào
     image = cv2.imread(args["image"])
@@ -29,17 +52,14 @@ def main():
         return
     
     # Thực hiện nhận diện đối tượng
-    results = detect_objects_yolo(
-        net, ln, image, 
-        confidence_threshold=args["confidence"], 
-        nms_threshold=args["threshold"]
-    )
+    results = detector.detect(image)
     
     # Vẽ kết quả nhận diện lên ảnh
     output_image = draw_predictions(image.copy(), results)
     
     # In ra số lượng đối tượng được phát hiện
     print(f"[INFO] Found {len(results)} objects in the image")
+    detector.report()
     
     # Hiển thị và/hoặc lưu ảnh
     cv2.imshow("Object Detection Result", output_image)
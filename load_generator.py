@@ -0,0 +1,91 @@
+"""
+Bộ tạo tải cục bộ cho detection_server.py: đo throughput và độ trễ đuôi (p95/p99)
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from config import SERVER_HOST, SERVER_PORT
+from evaluation import summarize_latencies
+
+async def post_image(reader, writer, host, port, body):
+    """
+    Gửi một request POST /detect trên kết nối keep-alive, trả về mã trạng thái
+    """
+    head = (f"POST /detect HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            "Content-Type: application/octet-stream\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    await reader.readexactly(length)
+    return status
+
+async def client(host, port, body, counter, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] > 0:
+            counter[0] -= 1
+            start = time.perf_counter()
+            status = await post_image(reader, writer, host, port, body)
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+async def run(args):
+    with open(args["image"], "rb") as f:
+        body = f.read()
+
+    counter = [args["requests"]]
+    latencies = []
+    statuses = Counter()
+
+    print(f"[INFO] sending {args['requests']} requests with {args['concurrency']} concurrent clients...")
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(args["host"], args["port"], body, counter, latencies, statuses)
+        for _ in range(args["concurrency"])
+    ])
+    elapsed = time.perf_counter() - start
+
+    summary = summarize_latencies(latencies)
+    print(f"[INFO] elapsed time: {elapsed:.2f} seconds")
+    print(f"[INFO] throughput: {len(latencies) / elapsed:.2f} successful requests/s")
+    print(f"[INFO] status codes: {dict(statuses)}")
+    if summary["count"]:
+        print("[INFO] latency: mean {mean_ms:.1f} ms, p50 {p50_ms:.1f} ms, "
+              "p95 {p95_ms:.1f} ms, p99 {p99_ms:.1f} ms, max {max_ms:.1f} ms".format(**summary))
+
+def main():
+    # Xử lý tham số dòng lệnh
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-i", "--image", required=True,
+        help="path to the image sent with every request")
+    ap.add_argument("--host", type=str, default=SERVER_HOST,
+        help="server address")
+    ap.add_argument("-p", "--port", type=int, default=SERVER_PORT,
+        help="server port")
+    ap.add_argument("-n", "--requests", type=int, default=200,
+        help="total number of requests to send")
+    ap.add_argument("-k", "--concurrency", type=int, default=16,
+        help="number of concurrent client connections")
+    args = vars(ap.parse_args())
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Tải các biến thể model YOLO (đầy đủ, tiny, input nhỏ hơn, int8 ONNX) và kiểm tra cổng độ chính xác
+
+Kết quả đánh giá của evaluate_variants.py được lưu trong VARIANT_GATE_PATH; biến thể nào
+có mAP giảm vượt quá ngưỡng cho phép hiện tại (MAP_DROP_TOLERANCE) sẽ bị từ chối khi tải.
+"""
+import json
+import os
+from config import MODEL_VARIANTS, VARIANT_GATE_PATH, MAP_DROP_TOLERANCE
+
+def load_gate(gate_path=VARIANT_GATE_PATH):
+    """
+    Đọc kết quả đánh giá các biến thể (dict rỗng nếu chưa đánh giá)
+    """
+    if not os.path.exists(gate_path):
+        return {}
+    with open(gate_path) as f:
+        return json.load(f)
+
+def save_gate(gate, gate_path=VARIANT_GATE_PATH):
+    with open(gate_path, "w") as f:
+        json.dump(gate, f, indent=2)
+
+def check_variant_gate(name, gate_path=VARIANT_GATE_PATH, tolerance=MAP_DROP_TOLERANCE):
+    """
+    Ném ValueError nếu mức giảm mAP đo bởi evaluate_variants.py vượt quá `tolerance`.
+    So sánh lại với ngưỡng hiện tại thay vì tin cờ "accepted" lưu lúc đánh giá, để một lần
+    chạy với --tolerance lỏng hơn không cho phép biến thể vĩnh viễn.
+    """
+    if name == "full":
+        return
+    record = load_gate(gate_path).get(name)
+    if record is None:
+        print(f"[WARNING] variant '{name}' has not been evaluated against the full model, "
+              "run evaluate_variants.py first")
+    elif record["map_drop"] > tolerance:
+        raise ValueError(f"Variant '{name}' was rejected: mAP@0.5 dropped by {record['map_drop']:.4f} "
+                         f"(tolerance {tolerance:.4f})")
+
+def load_model_variant(name, enforce_gate=True):
+    """
+    Tải biến thể model theo tên, trả về (net, ln, input_size)
+    """
+    from detection_utils import load_yolo_model, load_onnx_model
+
+    if name not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant '{name}', choose from: {', '.join(MODEL_VARIANTS)}")
+    if enforce_gate:
+        check_variant_gate(name)
+
+    variant = MODEL_VARIANTS[name]
+    if variant["format"] == "onnx":
+        net, ln = load_onnx_model(variant["model"])
+    else:
+        net, ln = load_yolo_model(variant["config"], variant["weights"])
+    size = variant["input_size"]
+    return net, ln, (size, size)
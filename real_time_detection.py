@@ -3,12 +3,9 @@ Chương trình nhận diện đối tượng trong thời gian thực từ webc
 """
 import argparse
 import time
-import cv2
-import imutils
-from imutils.video import VideoStream
-from imutils.video import FPS
-from config import CONFIG_PATH, WEIGHTS_PATH, DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD
-from detection_utils import load_yolo_model, detect_objects_yolo, draw_predictions
+from config import (DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD, DEFAULT_MODEL, ADAPTIVE_INPUT_SIZES,
+    REALTIME_TARGET_FPS)
+from detectors import DETECTORS, create_detector
 
 def main():
     # Xử lý tham số dòng lệnh
@@ -21,29 +18,107 @@ def main():
         help="camera source (default is 0 for webcam)")
     ap.add_argument("-w", "--width", type=int, default=400,
         help="width of the displayed frame")
+    ap.add_argument("-m", "--model", type=str, default=DEFAULT_MODEL,
+        choices=sorted(DETECTORS), help="detection model to use")
+    ap.add_argument("--roi", type=str,
+        help="path to ROI JSON file (polygons and optional classes), yolo models only")
+    ap.add_argument("--classes", type=str,
+        help="comma-separated class names or ids to detect, e.g. person,car (yolo models only)")
+    ap.add_argument("--crop-roi", action="store_true",
+        help="run inference only on the bounding rect of the ROI polygons")
+    ap.add_argument("--adaptive", action="store_true",
+        help="skip detections and lower the input size on the fly to hold --target-fps")
+    ap.add_argument("--target-fps", type=float, default=REALTIME_TARGET_FPS,
+        help="display FPS the adaptive controller aims for")
+    ap.add_argument("--decision-log", type=str,
+        help="path to a JSONL file recording every adaptive controller decision")
+    ap.add_argument("--streaming", action="store_true",
+        help="memory-bounded mode for long runs: pooled frame buffers and periodic memory sampling")
+    ap.add_argument("--memory-log", type=str,
+        help="path to a JSONL file for RSS/tracemalloc samples (streaming mode)")
+    ap.add_argument("--tracemalloc", action="store_true",
+        help="also sample Python allocations with tracemalloc (streaming mode, slower)")
+    ap.add_argument("--events", type=str,
+        help="path to a JSONL file of per-object enter/exit events (instead of per-frame records)")
     args = vars(ap.parse_args())
+    if (args["roi"] or args["classes"]) and not args["model"].startswith("yolo"):
+        ap.error("--roi/--classes are only supported with the yolo models")
+
+    # Import thư viện nặng sau khi parse tham số để `--help` khởi động nhanh
+    import cv2
+    import imutils
+    from imutils.video import VideoStream
+    from imutils.video import FPS
+    from detection_utils import draw_predictions
+    from roi_filter import load_roi_filter
 
     # Tải model
-    net, ln = load_yolo_model(CONFIG_PATH, WEIGHTS_PATH)
+    detector_kwargs = {}
+    roi_filter = load_roi_filter(args["roi"], args["classes"], args["crop_roi"])
+    if roi_filter is not None:
+        detector_kwargs["roi_filter"] = roi_filter
+    detector = create_detector(
+        args["model"],
+        confidence_threshold=args["confidence"],
+        nms_threshold=args["threshold"],
+        **detector_kwargs
+    )
+
+    # Khởi tạo bộ điều khiển bỏ qua frame thích ứng
+    controller = None
+    if args["adaptive"]:
+        from adaptive_skip import AdaptiveSkipController
+        
+        input_sizes = None
+        if hasattr(detector, "input_size"):
+            input_sizes = [s for s in ADAPTIVE_INPUT_SIZES if s <= detector.input_size[0]]
+        controller = AdaptiveSkipController(args["target_fps"], input_sizes, log_path=args["decision_log"])
+
+    # Gộp kết quả theo thời gian thành sự kiện theo từng đối tượng
+    tracker = None
+    if args["events"]:
+        from events import EventTracker, EventWriter
+        tracker = EventTracker()
+        event_writer = EventWriter(args["events"])
 
     # Khởi tạo video stream
     print("[INFO] starting video stream...")
-    vs = VideoStream(src=args["source"]).start()
-    time.sleep(2.0)
+    sampler = None
+    if args["streaming"]:
+        # Frame được đọc vào các buffer cố định của pool thay vì cấp phát mới mỗi lần read()
+        from streaming import PooledCapture, MemorySampler
+        vs = PooledCapture(args["source"], width=args["width"])
+        sampler = MemorySampler(trace=args["tracemalloc"], log_path=args["memory_log"])
+    else:
+        vs = VideoStream(src=args["source"]).start()
+        time.sleep(2.0)
     fps = FPS().start()
+    frame_count = 0
+    results = []
 
     # Vòng lặp xử lý video
     while True:
         # Lấy frame từ video stream và resize
         frame = vs.read()
-        frame = imutils.resize(frame, width=args["width"])
+        if sampler is not None:
+            if frame is None:
+                break
+        else:
+            frame = imutils.resize(frame, width=args["width"])
+        frame_count += 1
         
-        # Thực hiện nhận diện đối tượng
-        results = detect_objects_yolo(
-            net, ln, frame, 
-            confidence_threshold=args["confidence"], 
-            nms_threshold=args["threshold"]
-        )
+        # Thực hiện nhận diện đối tượng (ở chế độ thích ứng, frame bị bỏ qua dùng lại kết quả trước)
+        inference_time = 0.0
+        if controller is None or controller.should_detect(frame_count):
+            start = time.time()
+            results = detector.detect(frame)
+            inference_time = time.time() - start
+            if tracker is not None:
+                event_writer.write(tracker.update(results, time.time()))
+            if controller is not None:
+                controller.update(frame_count, frame, inference_time, len(results))
+                if controller.input_size is not None:
+                    detector.input_size = (controller.input_size, controller.input_size)
         
         # Vẽ kết quả nhận diện lên frame
         frame = draw_predictions(frame, results)
@@ -52,17 +127,41 @@ def main():
         cv2.imshow("Real-Time Object Detection", frame)
         key = cv2.waitKey(1) & 0xFF
         
+        # Trả buffer về pool và lấy mẫu bộ nhớ định kỳ
+        if sampler is not None:
+            vs.release(frame)
+            if sampler.maybe_sample(frame_count) is not None and sampler.baseline is None:
+                sampler.set_baseline(frame_count)
+        
         # Nếu phím 'q' được nhấn, thoát khỏi vòng lặp
         if key == ord("q"):
             break
             
         # Cập nhật FPS counter
         fps.update()
+        if controller is not None:
+            controller.frame_done(inference_time)
     
     # Dừng timer và hiển thị thông tin FPS
     fps.stop()
     print("[INFO] elapsed time: {:.2f}".format(fps.elapsed()))
     print("[INFO] approx. FPS: {:.2f}".format(fps.fps()))
+    detector.report()
+    if tracker is not None:
+        event_writer.write(tracker.flush(time.time()))
+        event_writer.close()
+        tracker.report()
+    if controller is not None:
+        controller.close()
+        print(f"[INFO] adaptive controller made {controller.decisions} decisions")
+    
+    if sampler is not None:
+        sampler.sample(frame_count)
+        growth = sampler.growth()
+        if growth:
+            print(f"[INFO] memory growth since frame {sampler.baseline['frame']}: "
+                  + ", ".join(f"{k} {v:+.2f}" for k, v in growth.items()))
+        sampler.close()
     
     # Dọn dẹp
     cv2.destroyAllWindows()
@@ -0,0 +1,151 @@
+"""
+Lọc theo vùng quan tâm (ROI) và danh sách lớp cho phép, áp dụng ngay trong bước giải mã YOLO
+
+File ROI là JSON dạng:
+    {"polygons": [[[x1, y1], [x2, y2], ...], ...], "classes": ["person", "car"]}
+toạ độ tính bằng pixel trên frame gốc.
+"""
+import json
+import numpy as np
+from config import get_labels
+
+class RoiFilter:
+    """
+    Giữ danh sách polygon ROI và lớp cho phép, cùng thống kê khối lượng công việc tiết kiệm được
+    """
+    def __init__(self, polygons=None, classes=None, crop=False):
+        self.polygons = [self._validate_polygon(p) for p in polygons] if polygons else []
+        self.class_ids = self._resolve_classes(classes) if classes else None
+        self.crop = crop and bool(self.polygons)
+        self._masks = {}
+        self._warned_sizes = set()
+
+        # Thống kê
+        self.anchors = 0
+        self.anchors_out_of_roi = 0
+        self.pixels_inferred = 0
+        self.pixels_total = 0
+
+    @staticmethod
+    def _validate_polygon(polygon):
+        """
+        Kiểm tra polygon gồm ít nhất 3 điểm [x, y] không âm, trả về mảng int32 (N, 2)
+        """
+        try:
+            points = np.array(polygon, dtype=np.int32)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid ROI polygon {polygon!r}: expected a list of [x, y] points")
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+            raise ValueError(f"Invalid ROI polygon {polygon!r}: expected at least 3 [x, y] points")
+        if (points < 0).any():
+            raise ValueError(f"Invalid ROI polygon {polygon!r}: coordinates must be non-negative")
+        return points
+
+    @staticmethod
+    def _resolve_classes(classes):
+        labels = get_labels()
+        class_ids = []
+        for c in classes:
+            if isinstance(c, int) or str(c).isdigit():
+                class_id = int(c)
+            elif c in labels:
+                class_id = labels.index(c)
+            else:
+                raise ValueError(f"Unknown class '{c}'")
+            if not 0 <= class_id < len(labels):
+                raise ValueError(f"Class id {class_id} out of range")
+            class_ids.append(class_id)
+        return np.array(sorted(set(class_ids)), dtype=np.intp)
+
+    def score_columns(self):
+        """
+        Chỉ số các cột score cần giải mã trong output YOLO (None nếu giải mã tất cả)
+        """
+        return None if self.class_ids is None else 5 + self.class_ids
+
+    def mask(self, W, H):
+        """
+        Mask ROI (uint8, H x W) cho frame kích thước W x H, được cache theo kích thước
+        """
+        if (W, H) not in self._masks:
+            import cv2
+            mask = np.zeros((H, W), dtype=np.uint8)
+            cv2.fillPoly(mask, self.polygons, 255)
+            self._masks[(W, H)] = mask
+        return self._masks[(W, H)]
+
+    def bounding_rect(self, W, H):
+        """
+        Hình chữ nhật (x0, y0, x1, y1) bao tất cả polygon, giới hạn trong frame
+        """
+        points = np.vstack(self.polygons)
+        x0, y0 = np.maximum(points.min(axis=0), 0)
+        x1, y1 = np.minimum(points.max(axis=0) + 1, [W, H])
+        return int(x0), int(y0), int(x1), int(y1)
+
+    def crop_image(self, image):
+        """
+        Cắt ảnh theo bounding rect của ROI nếu bật crop, trả về (ảnh, (offset_x, offset_y))
+        """
+        (H, W) = image.shape[:2]
+        self.pixels_total += W * H
+        if not self.crop:
+            self.pixels_inferred += W * H
+            return image, (0, 0)
+        x0, y0, x1, y1 = self.bounding_rect(W, H)
+        if x1 <= x0 or y1 <= y0:
+            # ROI nằm ngoài frame (ví dụ vẽ cho độ phân giải lớn hơn): dùng cả frame,
+            # in_roi() sẽ loại mọi box nên kết quả vẫn rỗng
+            if (W, H) not in self._warned_sizes:
+                self._warned_sizes.add((W, H))
+                print(f"[WARNING] ROI polygons lie outside the {W}x{H} frame, no detections will be kept")
+            self.pixels_inferred += W * H
+            return image, (0, 0)
+        self.pixels_inferred += (x1 - x0) * (y1 - y0)
+        return image[y0:y1, x0:x1], (x0, y0)
+
+    def in_roi(self, center_x, center_y, W, H):
+        """
+        Mảng bool cho biết tâm các box (toạ độ frame gốc) có nằm trong ROI không
+        """
+        self.anchors += len(center_x)
+        if not self.polygons:
+            return np.ones(len(center_x), dtype=bool)
+        mask = self.mask(W, H)
+        inside = mask[np.clip(center_y, 0, H - 1), np.clip(center_x, 0, W - 1)] > 0
+        self.anchors_out_of_roi += int(len(inside) - inside.sum())
+        return inside
+
+    def report(self):
+        """
+        In thống kê khối lượng công việc tiết kiệm được
+        """
+        num_classes = len(get_labels())
+        if self.class_ids is not None:
+            saved = (1 - len(self.class_ids) / num_classes) * 100
+            print(f"[INFO] [roi] decoded {len(self.class_ids)}/{num_classes} score columns ({saved:.1f}% skipped)")
+        if self.anchors:
+            dropped = self.anchors_out_of_roi / self.anchors * 100
+            print(f"[INFO] [roi] dropped {self.anchors_out_of_roi}/{self.anchors} candidate boxes "
+                  f"outside ROI before NMS ({dropped:.1f}%)")
+        if self.crop and self.pixels_total:
+            saved = (1 - self.pixels_inferred / self.pixels_total) * 100
+            print(f"[INFO] [roi] cropped input to ROI bounding rect ({saved:.1f}% of pixels skipped)")
+
+def load_roi_filter(roi_path=None, classes=None, crop=False):
+    """
+    Tạo RoiFilter từ file ROI JSON và/hoặc danh sách lớp (chuỗi "person,car" hoặc list).
+    Trả về None nếu không có bộ lọc nào.
+    """
+    polygons = []
+    if roi_path:
+        with open(roi_path) as f:
+            roi = json.load(f)
+        polygons = roi.get("polygons", [])
+        if classes is None:
+            classes = roi.get("classes")
+    if isinstance(classes, str):
+        classes = [c.strip() for c in classes.split(",") if c.strip()]
+    if not polygons and not classes:
+        return None
+    return RoiFilter(polygons, classes, crop)
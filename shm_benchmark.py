@@ -0,0 +1,167 @@
+"""
+Đo pool tiến trình dùng shared memory (shm_pool.py): throughput, độ trễ, RSS / PSS của từng
+worker và chi phí chuyển một frame giữa các tiến trình (shared memory so với pickle qua hàng đợi)
+"""
+import argparse
+import os
+import sys
+import time
+from config import CONFIG_PATH, WEIGHTS_PATH, SHM_SLOTS_PER_WORKER, SHM_MAX_DETECTIONS
+
+def _echo(requests, replies):
+    """
+    Tiến trình phụ để đo chi phí chuyển frame: nhận một message và trả lời bằng một tuple nhỏ
+    """
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        replies.put(getattr(item, "shape", None))
+
+def measure_transfer(frame, repeats=200):
+    """
+    Thời gian trung bình (giây) để gửi một frame sang tiến trình khác và nhận phản hồi:
+    chép vào shared memory + gửi (slot, shape), so với pickle cả frame qua multiprocessing.Queue
+    """
+    import multiprocessing as mp
+    import numpy as np
+    from shm_pool import ShmRing
+
+    requests, replies = mp.Queue(), mp.Queue()
+    echo = mp.Process(target=_echo, args=(requests, replies), daemon=True)
+    echo.start()
+    ring = ShmRing(1, frame.nbytes, max_detections=1)
+    try:
+        # Làm nóng hàng đợi
+        requests.put((0, frame.shape))
+        replies.get()
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            view = ring.frame(0, frame.shape)
+            np.copyto(view, frame)
+            del view
+            requests.put((0, frame.shape))
+            replies.get()
+        shm_time = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            requests.put(frame)
+            replies.get()
+        pickle_time = (time.perf_counter() - start) / repeats
+    finally:
+        requests.put(None)
+        echo.join()
+        ring.close()
+        ring.unlink()
+    return shm_time, pickle_time
+
+def read_frames(capture, width, limit):
+    """
+    Đọc tối đa `limit` frame, resize về chiều rộng `width`
+    """
+    import cv2
+    count = 0
+    while count < limit:
+        (grabbed, frame) = capture.read()
+        if not grabbed:
+            break
+        (h, w) = frame.shape[:2]
+        if width and width != w:
+            frame = cv2.resize(frame, (width, int(h * width / w)))
+        count += 1
+        yield frame
+
+def main():
+    # Xử lý tham số dòng lệnh
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-i", "--input", type=str,
+        help="path to input video (a synthetic source is used if omitted)")
+    ap.add_argument("-n", "--frames", type=int, default=200,
+        help="number of frames to process")
+    ap.add_argument("-j", "--workers", type=int, default=2,
+        help="number of worker processes")
+    ap.add_argument("-w", "--width", type=int, default=640,
+        help="width frames are resized to before detection")
+    ap.add_argument("--slots-per-worker", type=int, default=SHM_SLOTS_PER_WORKER,
+        help="shared-memory frame slots per worker")
+    ap.add_argument("--no-share-weights", action="store_true",
+        help="let every worker load its own copy of the model instead of forking after loading it once")
+    ap.add_argument("--max-detections", type=int, default=SHM_MAX_DETECTIONS,
+        help="maximum detections per frame returned through shared memory")
+    args = vars(ap.parse_args())
+
+    import cv2
+    from shm_pool import SharedMemoryPool
+    from streaming import process_memory
+    from evaluation import summarize_latencies
+
+    if args["input"]:
+        capture = cv2.VideoCapture(args["input"])
+    else:
+        from soak_test import SyntheticCapture
+        capture = SyntheticCapture(1280, 720, args["frames"])
+    frames = read_frames(capture, args["width"], args["frames"])
+    first = next(frames, None)
+    if first is None:
+        print("[ERROR] no frames could be read from the input")
+        return
+
+    shm_time, pickle_time = measure_transfer(first)
+    print(f"[INFO] frame transfer ({first.nbytes / 1024:.0f} KB): shared memory {shm_time * 1e6:.0f} us, "
+          f"pickle {pickle_time * 1e6:.0f} us ({pickle_time / shm_time:.1f}x)")
+
+    pool = SharedMemoryPool(args["workers"], first.shape, slots_per_worker=args["slots_per_worker"],
+        config_path=CONFIG_PATH, weights_path=WEIGHTS_PATH, share_weights=not args["no_share_weights"],
+        max_detections=args["max_detections"])
+    try:
+        pool.start()
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    with pool:
+        memory_loaded = pool.worker_memory()
+        latencies = []
+        detections = 0
+        start = time.time()
+
+        def all_frames():
+            yield first
+            yield from frames
+
+        for (results, latency) in pool.map(all_frames()):
+            latencies.append(latency)
+            detections += len(results)
+        elapsed = time.time() - start
+        memory_running = pool.worker_memory()
+        parent_memory = process_memory(os.getpid())
+        copy_us = pool.copy_time / max(pool.frames, 1) * 1e6
+        truncated = pool.truncated
+    capture.release()
+
+    summary = summarize_latencies(latencies)
+    print(f"[INFO] {len(latencies)} frames in {elapsed:.2f} seconds ({len(latencies) / elapsed:.2f} FPS), "
+          f"{detections} detections")
+    print("[INFO] worker latency: mean {mean_ms:.1f} ms, p50 {p50_ms:.1f} ms, "
+          "p95 {p95_ms:.1f} ms, p99 {p99_ms:.1f} ms, max {max_ms:.1f} ms".format(**summary))
+    print(f"[INFO] frame copy into shared memory: {copy_us:.0f} us per frame")
+    if truncated:
+        print(f"[WARNING] {truncated} frames had more than {args['max_detections']} detections and were truncated")
+
+    for label, memory in (("after load", memory_loaded), ("after run", memory_running)):
+        for worker in memory:
+            details = f"RSS {worker.get('rss_mb', 0):.1f} MB"
+            if "pss_mb" in worker:
+                details += (f", PSS {worker['pss_mb']:.1f} MB, shared {worker['shared_mb']:.1f} MB, "
+                            f"private {worker['private_mb']:.1f} MB")
+            print(f"[INFO] worker {worker['pid']} {label}: {details}")
+    if "pss_mb" in parent_memory and all("pss_mb" in worker for worker in memory_running):
+        # Tổng PSS (kể cả tiến trình chính, nơi giữ bản trọng số dùng chung) là bộ nhớ thực của pool
+        total_rss = sum(worker["rss_mb"] for worker in memory_running)
+        total_pss = sum(worker["pss_mb"] for worker in memory_running) + parent_memory["pss_mb"]
+        print(f"[INFO] parent: RSS {parent_memory['rss_mb']:.1f} MB, PSS {parent_memory['pss_mb']:.1f} MB")
+        print(f"[INFO] workers total RSS {total_rss:.1f} MB; pool total PSS (parent + workers) {total_pss:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Pool tiến trình nhận diện YOLO dùng shared memory
+
+- Frame được chép vào một slot của vòng buffer trong multiprocessing.shared_memory; qua hàng đợi
+  chỉ gửi (seq, slot, shape) thay vì pickle cả frame
+- Worker ghi kết quả dạng mảng gọn (N, 6) float32 [x, y, w, h, confidence, class_id] vào
+  vùng kết quả của cùng slot
+- Trọng số dùng chung: tiến trình chính tải model và chạy một forward pass làm nóng (để OpenCV
+  tạo sẵn các blob trọng số đã fuse / sắp xếp lại), rồi fork các worker. Các trang chứa trọng số
+  được chia sẻ copy-on-write và giữ nguyên vì worker chỉ chạy forward với cùng kích thước input.
+  Trên nền tảng không có fork (Windows, macOS mặc định spawn), mỗi worker tự tải một bản riêng.
+  RSS / PSS của từng worker được đo để kiểm chứng.
+"""
+import os
+import queue
+import time
+import traceback
+import multiprocessing as mp
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+from config import (CONFIG_PATH, WEIGHTS_PATH, DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD, DEFAULT_WIDTH,
+    DEFAULT_HEIGHT, SHM_SLOTS_PER_WORKER, SHM_MAX_DETECTIONS)
+from streaming import process_memory
+
+RESULT_COLUMNS = 6
+
+def _align(size, alignment=64):
+    return (size + alignment - 1) // alignment * alignment
+
+class ShmRing:
+    """
+    Một khối shared memory chia thành `slots` slot, mỗi slot gồm vùng frame (uint8) và vùng
+    kết quả (max_detections x 6 float32). Tạo mới nếu `name` là None, ngược lại gắn vào khối có sẵn.
+    """
+    def __init__(self, slots, frame_bytes, max_detections=SHM_MAX_DETECTIONS, name=None):
+        self.slots = slots
+        self.max_detections = max_detections
+        self.frame_bytes = _align(frame_bytes)
+        self.slot_bytes = _align(self.frame_bytes + max_detections * RESULT_COLUMNS * 4)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def spec(self):
+        """
+        Tham số để tiến trình khác gắn vào cùng khối shared memory
+        """
+        return (self.slots, self.frame_bytes, self.max_detections, self.name)
+
+    def frame(self, slot, shape):
+        """
+        View numpy của vùng frame trong slot (không copy)
+        """
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def results(self, slot):
+        """
+        View numpy của vùng kết quả trong slot (không copy)
+        """
+        return np.ndarray((self.max_detections, RESULT_COLUMNS), dtype=np.float32, buffer=self.shm.buf,
+            offset=slot * self.slot_bytes + self.frame_bytes)
+
+    def close(self):
+        # Mọi view numpy phải được giải phóng trước khi đóng
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def results_to_dicts(detections):
+    """
+    Chuyển mảng kết quả (N, 6) về dạng danh sách dict như detect_objects_yolo (dùng cho draw_predictions)
+    """
+    from config import get_labels
+    labels = get_labels()
+    return [{
+        "class_id": int(class_id),
+        "label": labels[int(class_id)],
+        "confidence": float(confidence),
+        "box": (int(x), int(y), int(w), int(h))
+    } for x, y, w, h, confidence, class_id in detections]
+
+
+def _warm_up(net, ln, input_size):
+    """
+    Chạy một forward pass trên ảnh đen với đúng kích thước input mà worker sẽ dùng, để mọi buffer
+    trọng số và bộ nhớ của layer được cấp phát trước khi fork
+    """
+    from detection_utils import create_yolo_blob
+    net.setInput(create_yolo_blob(np.zeros((input_size[1], input_size[0], 3), dtype=np.uint8), *input_size))
+    net.forward(ln)
+
+
+def _worker(ring_spec, tasks, done, shared_net, config_path, weights_path, confidence, threshold, input_size):
+    ring = None
+    try:
+        import cv2
+        from detection_utils import load_yolo_model, create_yolo_blob, decode_yolo_outputs
+
+        # Mỗi worker một luồng: song song hoá giữa các tiến trình thay vì trong OpenCV
+        cv2.setNumThreads(1)
+        if shared_net is not None:
+            # Model kế thừa từ tiến trình chính qua fork (trang trọng số dùng chung copy-on-write)
+            net, ln = shared_net
+        else:
+            net, ln = load_yolo_model(config_path, weights_path)
+        ring = ShmRing(*ring_spec[:3], name=ring_spec[3])
+        done.put(("ready", os.getpid()))
+
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            (seq, slot, shape) = task
+            start = time.perf_counter()
+            frame = ring.frame(slot, shape)
+            net.setInput(create_yolo_blob(frame, *input_size))
+            detections = decode_yolo_outputs(net.forward(ln), shape[1], shape[0], confidence, threshold)
+            del frame
+
+            # Kết quả sau NMS đã xếp theo độ tin cậy giảm dần; nếu vượt quá vùng kết quả thì giữ
+            # các kết quả tốt nhất và báo tổng số thật để tiến trình chính cảnh báo
+            out = ring.results(slot)
+            count = min(len(detections), ring.max_detections)
+            for i, d in enumerate(detections[:count]):
+                out[i, :4] = d["box"]
+                out[i, 4] = d["confidence"]
+                out[i, 5] = d["class_id"]
+            del out
+            done.put(("result", seq, slot, count, len(detections), time.perf_counter() - start))
+    except Exception:
+        # Báo lỗi về tiến trình chính thay vì để nó chờ mãi
+        done.put(("error", os.getpid(), traceback.format_exc()))
+    finally:
+        if ring is not None:
+            ring.close()
+
+
+class SharedMemoryPool:
+    """
+    Pool gồm `workers` tiến trình nhận diện, nhận frame qua vòng buffer shared memory.
+    Frame có kích thước tối đa `frame_shape` (H, W, C); có `workers * slots_per_worker` slot.
+
+    Dùng: submit(frame) trả về seq, get(seq) trả về (mảng (N, 6), độ trễ); hoặc map(frames)
+    trả về kết quả theo đúng thứ tự frame.
+
+    Với `share_weights`, model được tải trong tiến trình chính trước khi fork; nên tạo pool trước
+    khi chạy các tác vụ OpenCV song song khác trong tiến trình chính.
+    """
+    def __init__(self, workers, frame_shape, slots_per_worker=SHM_SLOTS_PER_WORKER,
+                 config_path=CONFIG_PATH, weights_path=WEIGHTS_PATH, share_weights=True,
+                 confidence_threshold=DEFAULT_CONFIDENCE, nms_threshold=DEFAULT_THRESHOLD,
+                 input_size=(DEFAULT_WIDTH, DEFAULT_HEIGHT), max_detections=SHM_MAX_DETECTIONS):
+        self.workers = workers
+        self.frame_shape = tuple(frame_shape)
+        self.slots = workers * slots_per_worker
+        self.worker_args = (config_path, weights_path, confidence_threshold, nms_threshold,
+            tuple(input_size))
+        self.max_detections = max_detections
+        self.share_weights = share_weights and "fork" in mp.get_all_start_methods()
+        self.shared_net = None
+        self.ring = None
+        self.processes = []
+        self.pids = []
+        self.free = deque()
+        self.completed = {}
+        self.next_seq = 0
+        self.copy_time = 0.0
+        self.frames = 0
+        self.truncated = 0
+
+    def start(self):
+        if self.share_weights:
+            import cv2
+            from detection_utils import load_yolo_model
+            (config_path, weights_path, _, _, input_size) = self.worker_args
+            try:
+                self.shared_net = load_yolo_model(config_path, weights_path)
+            except cv2.error as e:
+                raise RuntimeError(f"failed to load the model: {e}") from e
+            # Làm nóng với một luồng để không có thread pool nào của OpenCV tồn tại lúc fork
+            threads = cv2.getNumThreads()
+            cv2.setNumThreads(1)
+            try:
+                _warm_up(*self.shared_net, input_size)
+            finally:
+                cv2.setNumThreads(threads)
+            context = mp.get_context("fork")
+        else:
+            context = mp.get_context()
+
+        frame_bytes = int(np.prod(self.frame_shape))
+        self.ring = ShmRing(self.slots, frame_bytes, self.max_detections)
+        self.free = deque(range(self.slots))
+        self.tasks = context.Queue()
+        self.done = context.Queue()
+        for _ in range(self.workers):
+            # Với fork, đối tượng net được kế thừa trực tiếp (không pickle)
+            process = context.Process(target=_worker, daemon=True,
+                args=(self.ring.spec(), self.tasks, self.done, self.shared_net) + self.worker_args)
+            process.start()
+            self.processes.append(process)
+
+        # Chờ tất cả worker tải xong model; nếu có worker lỗi thì dừng pool và giải phóng shared memory
+        try:
+            while len(self.pids) < self.workers:
+                message = self._receive()
+                if message[0] != "ready":
+                    raise RuntimeError(f"unexpected message from worker during start: {message[0]}")
+                self.pids.append(message[1])
+        except BaseException:
+            self.close()
+            raise
+        print(f"[INFO] shared-memory pool ready: {self.workers} workers, {self.slots} slots "
+              f"of {self.ring.slot_bytes / 1024 / 1024:.1f} MB, "
+              + ("weights shared copy-on-write" if self.shared_net is not None else "one weights copy per worker"))
+        return self
+
+    def _receive(self, poll_interval=1.0):
+        """
+        Nhận một message từ worker; báo lỗi nếu worker gửi traceback hoặc có worker đã chết
+        """
+        while True:
+            try:
+                message = self.done.get(timeout=poll_interval)
+            except queue.Empty:
+                dead = [p for p in self.processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"worker {dead[0].pid} exited unexpectedly "
+                                       f"(exit code {dead[0].exitcode})")
+                continue
+            if message[0] == "error":
+                raise RuntimeError(f"worker {message[1]} failed:\n{message[2]}")
+            return message
+
+    def _collect(self):
+        """
+        Nhận một kết quả từ worker, chép mảng kết quả ra khỏi slot và trả slot về vòng buffer
+        """
+        (_, seq, slot, count, total, latency) = self._receive()
+        self.completed[seq] = (self.ring.results(slot)[:count].copy(), latency)
+        self.free.append(slot)
+        if total > count:
+            # Chỉ cảnh báo lần đầu, các lần sau được đếm trong self.truncated
+            if self.truncated == 0:
+                print(f"[WARNING] frame {seq}: {total} detections, only the {count} most confident fit "
+                      "the result slot (increase max_detections or the confidence threshold)")
+            self.truncated += 1
+
+    def submit(self, frame):
+        """
+        Chép frame vào một slot trống và giao cho worker; chặn nếu mọi slot đang bận
+        """
+        if frame.dtype != np.uint8 or frame.size > np.prod(self.frame_shape):
+            raise ValueError(f"frame {frame.shape} {frame.dtype} does not fit a {self.frame_shape} uint8 slot")
+        while not self.free:
+            self._collect()
+        slot = self.free.popleft()
+
+        start = time.perf_counter()
+        view = self.ring.frame(slot, frame.shape)
+        np.copyto(view, frame)
+        del view
+        self.copy_time += time.perf_counter() - start
+        self.frames += 1
+
+        seq = self.next_seq
+        self.next_seq += 1
+        self.tasks.put((seq, slot, frame.shape))
+        return seq
+
+    def get(self, seq):
+        """
+        Chờ và trả về (mảng kết quả (N, 6), độ trễ nhận diện trong worker) của frame `seq`
+        """
+        while seq not in self.completed:
+            self._collect()
+        return self.completed.pop(seq)
+
+    def map(self, frames):
+        """
+        Nhận diện một dãy frame, giữ tối đa `slots` frame đang xử lý, trả kết quả theo thứ tự
+        """
+        pending = deque()
+        for frame in frames:
+            if len(pending) >= self.slots:
+                yield self.get(pending.popleft())
+            pending.append(self.submit(frame))
+        while pending:
+            yield self.get(pending.popleft())
+
+    def worker_memory(self):
+        """
+        RSS / PSS của từng worker (MB)
+        """
+        return [dict(pid=pid, **process_memory(pid)) for pid in self.pids]
+
+    def close(self):
+        for process in self.processes:
+            if process.is_alive():
+                self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.shared_net = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring.unlink()
+            self.ring = None
+
+    def __enter__(self):
+        if self.ring is None:
+            self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
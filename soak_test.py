@@ -0,0 +1,124 @@
+"""
+Soak test cho chế độ streaming: chạy một nguồn frame tổng hợp qua PooledCapture, vẽ kết quả
+và lấy mẫu bộ nhớ, rồi kiểm tra RSS và tracemalloc không tăng sau giai đoạn khởi động.
+Thoát với mã 1 nếu bộ nhớ tăng vượt ngưỡng.
+"""
+import argparse
+import sys
+import time
+from config import (SOAK_WARMUP_FRAMES, SOAK_FRAMES, SOAK_MAX_RSS_GROWTH_MB,
+    SOAK_MAX_TRACED_GROWTH_MB, MEMORY_SAMPLE_EVERY)
+
+class SyntheticCapture:
+    """Nguồn frame tổng hợp có giao diện read(image) giống cv2.VideoCapture"""
+    def __init__(self, width, height, num_frames):
+        import cv2
+        self.cv2 = cv2
+        self.width = width
+        self.height = height
+        self.num_frames = num_frames
+        self.index = 0
+
+    def read(self, image=None):
+        if self.index >= self.num_frames:
+            return False, None
+        if image is None:
+            import numpy as np
+            image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+        # Nền thay đổi độ sáng và một hình chữ nhật di chuyển
+        image.fill(self.index % 200)
+        x = (self.index * 3) % (self.width - 40)
+        self.cv2.rectangle(image, (x, self.height // 3), (x + 40, self.height // 3 + 60), (0, 255, 0), -1)
+        self.index += 1
+        return True, image
+
+    def release(self):
+        pass
+
+def synthetic_results(frame_index, width):
+    """
+    Kết quả nhận diện giả lập (tạo mới mỗi frame, giống danh sách trả về từ detector)
+    """
+    x = (frame_index * 3) % (width - 40)
+    return [{"class_id": 0, "label": "person", "confidence": 0.9, "box": (x, 100, 40, 60)}]
+
+def main():
+    # Xử lý tham số dòng lệnh
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", "--frames", type=int, default=SOAK_FRAMES,
+        help="number of synthetic frames to process")
+    ap.add_argument("--size", type=str, default="640x480",
+        help="synthetic source frame size WxH")
+    ap.add_argument("-w", "--width", type=int, default=400,
+        help="width frames are resized to, as in real_time_detection.py")
+    ap.add_argument("-m", "--model", type=str,
+        help="run a real detector (slow) instead of synthetic results")
+    ap.add_argument("--every", type=int, default=MEMORY_SAMPLE_EVERY * 10,
+        help="sample memory every N frames")
+    ap.add_argument("--max-rss-growth", type=float, default=SOAK_MAX_RSS_GROWTH_MB,
+        help="maximum allowed RSS growth in MB after warmup")
+    ap.add_argument("--max-traced-growth", type=float, default=SOAK_MAX_TRACED_GROWTH_MB,
+        help="maximum allowed tracemalloc growth in MB after warmup")
+    ap.add_argument("--memory-log", type=str,
+        help="path to a JSONL file for memory samples")
+    args = vars(ap.parse_args())
+
+    from detection_utils import draw_predictions
+    from streaming import PooledCapture, MemorySampler
+
+    (src_w, src_h) = (int(v) for v in args["size"].lower().split("x"))
+    detector = None
+    if args["model"]:
+        from detectors import create_detector
+        detector = create_detector(args["model"])
+
+    vs = PooledCapture(SyntheticCapture(src_w, src_h, args["frames"]), width=args["width"])
+    sampler = MemorySampler(every=args["every"], trace=True, log_path=args["memory_log"])
+    warmup = min(SOAK_WARMUP_FRAMES, args["frames"] // 10)
+
+    print(f"[INFO] soaking streaming pipeline for {args['frames']} frames...")
+    start = time.time()
+    frame_count = 0
+    max_growth = {}
+    while True:
+        frame = vs.read()
+        if frame is None:
+            break
+        frame_count += 1
+
+        results = detector.detect(frame) if detector is not None else synthetic_results(frame_count, args["width"])
+        draw_predictions(frame, results)
+        vs.release(frame)
+
+        if frame_count == warmup:
+            sampler.set_baseline(frame_count)
+        elif sampler.maybe_sample(frame_count) is not None and sampler.baseline is not None:
+            for key, value in sampler.growth().items():
+                max_growth[key] = max(max_growth.get(key, value), value)
+            sample = sampler.samples[-1]
+            print(f"[INFO] frame {frame_count}: RSS {sample['rss_mb']:.1f} MB, "
+                  f"traced {sample['traced_mb']:.2f} MB")
+
+    elapsed = time.time() - start
+    vs.stop()
+    sampler.close()
+
+    print(f"[INFO] processed {frame_count} frames in {elapsed:.1f} seconds ({frame_count / elapsed:.0f} FPS)")
+    if not max_growth:
+        print("[ERROR] not enough frames to compare memory against the warmup baseline")
+        sys.exit(1)
+    print(f"[INFO] max growth after warmup: RSS {max_growth['rss_mb']:+.2f} MB, "
+          f"traced {max_growth['traced_mb']:+.2f} MB")
+
+    failed = False
+    if max_growth["rss_mb"] > args["max_rss_growth"]:
+        print(f"[ERROR] RSS grew by more than {args['max_rss_growth']} MB")
+        failed = True
+    if max_growth["traced_mb"] > args["max_traced_growth"]:
+        print(f"[ERROR] traced Python allocations grew by more than {args['max_traced_growth']} MB")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Kiểm tra hồi quy thời gian khởi động: chạy `image_detection.py --help` với `-X importtime`
+và báo lỗi nếu tổng thời gian import vượt ngân sách hoặc thư viện nặng bị import sớm
+"""
+import argparse
+import subprocess
+import sys
+from config import STARTUP_IMPORT_BUDGET_MS
+
+# Các module không được phép import chỉ để in `--help`
+HEAVY_MODULES = ("cv2", "numpy", "imutils", "PyQt5")
+
+def measure_import_time(script, runs=3):
+    """
+    Chạy `script --help` nhiều lần, trả về (tổng thời gian import nhỏ nhất tính bằng ms,
+    danh sách module nặng đã bị import)
+    """
+    best_ms = None
+    heavy = set()
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", script, "--help"],
+            capture_output=True, text=True, check=True)
+
+        total_us = 0
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, _, name = line[len("import time:"):].split("|")
+            total_us += int(self_us)
+            name = name.strip()
+            if name.split(".")[0] in HEAVY_MODULES:
+                heavy.add(name)
+
+        total_ms = total_us / 1000
+        best_ms = total_ms if best_ms is None else min(best_ms, total_ms)
+    return best_ms, sorted(heavy)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-s", "--script", type=str, default="image_detection.py",
+        help="CLI script to measure")
+    ap.add_argument("-b", "--budget", type=float, default=STARTUP_IMPORT_BUDGET_MS,
+        help="maximum total import time in milliseconds")
+    ap.add_argument("-r", "--runs", type=int, default=3,
+        help="number of runs (the fastest one is kept)")
+    args = vars(ap.parse_args())
+
+    total_ms, heavy = measure_import_time(args["script"], args["runs"])
+    print(f"[INFO] {args['script']} --help imports took {total_ms:.1f} ms (budget {args['budget']:.1f} ms)")
+
+    failed = False
+    if heavy:
+        print(f"[ERROR] heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args["budget"]:
+        print("[ERROR] startup import time is over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Chế độ streaming giới hạn bộ nhớ cho các nguồn video rất dài hoặc không kết thúc
+
+- FramePool: số lượng buffer frame cố định, được cấp phát trước và tái sử dụng
+- PooledCapture: đọc frame từ cv2.VideoCapture vào buffer của pool thay vì cấp phát mới mỗi lần read()
+- MemorySampler: lấy mẫu RSS và tracemalloc định kỳ để phát hiện rò rỉ bộ nhớ
+- process_memory: RSS / PSS của một tiến trình khác (dùng cho pool worker trong shm_pool.py)
+"""
+import json
+import os
+import queue
+import time
+import tracemalloc
+from collections import deque
+import numpy as np
+from config import STREAM_POOL_SIZE, MEMORY_SAMPLE_EVERY
+
+class FramePool:
+    """Pool có dung lượng cố định gồm các mảng frame cùng kích thước"""
+    def __init__(self, capacity, shape, dtype=np.uint8):
+        self.capacity = capacity
+        self.shape = tuple(shape)
+        self._free = queue.Queue(maxsize=capacity)
+        for _ in range(capacity):
+            self._free.put(np.empty(self.shape, dtype=dtype))
+
+    def acquire(self, timeout=None):
+        """
+        Lấy một buffer trống; chặn nếu tất cả buffer đang được dùng
+        """
+        return self._free.get(timeout=timeout)
+
+    def release(self, frame):
+        self._free.put_nowait(frame)
+
+    def available(self):
+        return self._free.qsize()
+
+
+class PooledCapture:
+    """
+    Giải mã frame từ cv2.VideoCapture vào một buffer dùng lại, rồi resize (hoặc copy) vào buffer
+    của pool. Mọi frame trả về phải được trả lại bằng release().
+    """
+    def __init__(self, source, width=None, pool_size=STREAM_POOL_SIZE):
+        import cv2
+        self.cv2 = cv2
+        # `source` có thể là chỉ số camera / đường dẫn, hoặc một đối tượng có read() giống VideoCapture
+        self.capture = source if hasattr(source, "read") else cv2.VideoCapture(source)
+        self.width = width
+        self.pool_size = pool_size
+        self.raw = None
+        self.pool = None
+        self.size = None
+
+    def _init_pools(self, frame):
+        (h, w) = frame.shape[:2]
+        self.raw = np.empty_like(frame)
+        if self.width and self.width != w:
+            self.size = (self.width, int(h * self.width / w))
+            self.pool = FramePool(self.pool_size, (self.size[1], self.size[0]) + frame.shape[2:], frame.dtype)
+        else:
+            self.pool = FramePool(self.pool_size, frame.shape, frame.dtype)
+
+    def _to_pool(self, frame):
+        out = self.pool.acquire()
+        if self.size is not None:
+            self.cv2.resize(frame, self.size, dst=out)
+        else:
+            np.copyto(out, frame)
+        return out
+
+    def read(self):
+        """
+        Trả về frame (mảng của pool) hoặc None nếu nguồn đã hết
+        """
+        if self.pool is None:
+            (grabbed, frame) = self.capture.read()
+            if not grabbed:
+                return None
+            self._init_pools(frame)
+            return self._to_pool(frame)
+
+        # Giải mã vào buffer có sẵn (OpenCV ghi đè khi kích thước và kiểu khớp)
+        (grabbed, frame) = self.capture.read(self.raw)
+        if not grabbed:
+            return None
+        return self._to_pool(frame)
+
+    def release(self, frame):
+        self.pool.release(frame)
+
+    def stop(self):
+        self.capture.release()
+
+
+def current_rss():
+    """
+    Resident set size hiện tại của tiến trình (byte)
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Không có /proc (macOS, Windows): dùng RSS tối đa
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def process_memory(pid):
+    """
+    Bộ nhớ của một tiến trình bất kỳ (MB): RSS, PSS và phần shared / private.
+    PSS chia các trang dùng chung cho số tiến trình cùng ánh xạ, nên tổng PSS của các worker
+    phản ánh đúng bộ nhớ thực tế mà pool chiếm. Trả về {} nếu không đọc được /proc.
+    """
+    memory = {}
+    try:
+        # Linux 4.14+: tổng hợp smaps của toàn bộ tiến trình
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    memory[name] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    if "Rss" not in memory:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        memory["Rss"] = int(line.split()[1]) / 1024
+        except OSError:
+            return {}
+    result = {"rss_mb": memory.get("Rss", 0.0)}
+    if "Pss" in memory:
+        result["pss_mb"] = memory["Pss"]
+        result["shared_mb"] = memory.get("Shared_Clean", 0.0) + memory.get("Shared_Dirty", 0.0)
+        result["private_mb"] = memory.get("Private_Clean", 0.0) + memory.get("Private_Dirty", 0.0)
+    return result
+
+
+class MemorySampler:
+    """Lấy mẫu RSS và tracemalloc mỗi `every` frame, lưu số mẫu có giới hạn"""
+    def __init__(self, every=MEMORY_SAMPLE_EVERY, trace=False, log_path=None, max_samples=1000):
+        self.every = every
+        self.trace = trace
+        self.samples = deque(maxlen=max_samples)
+        self.baseline = None
+        self.log = open(log_path, "a") if log_path else None
+        self.started = time.time()
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def maybe_sample(self, frame_index):
+        if frame_index % self.every == 0:
+            return self.sample(frame_index)
+        return None
+
+    def sample(self, frame_index):
+        sample = {
+            "frame": frame_index,
+            "elapsed_s": time.time() - self.started,
+            "rss_mb": current_rss() / 1024 / 1024,
+        }
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            sample["traced_mb"] = current / 1024 / 1024
+            sample["traced_peak_mb"] = peak / 1024 / 1024
+        self.samples.append(sample)
+        if self.log is not None:
+            self.log.write(json.dumps(sample) + "\n")
+            self.log.flush()
+        return sample
+
+    def set_baseline(self, frame_index):
+        """
+        Ghi nhận mẫu gốc sau giai đoạn khởi động để so sánh mức tăng bộ nhớ
+        """
+        self.baseline = self.sample(frame_index)
+
+    def growth(self):
+        """
+        Mức tăng (MB) của RSS và bộ nhớ tracemalloc so với mẫu gốc
+        """
+        if self.baseline is None or not self.samples:
+            return {}
+        last = self.samples[-1]
+        growth = {"rss_mb": last["rss_mb"] - self.baseline["rss_mb"]}
+        if self.trace:
+            growth["traced_mb"] = last["traced_mb"] - self.baseline["traced_mb"]
+        return growth
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+        if self.trace:
+            tracemalloc.stop()
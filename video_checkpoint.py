@@ -0,0 +1,137 @@
+"""
+Checkpoint cho các job video dài: ghi output thành nhiều segment, lưu log nhận diện và
+vị trí frame để có thể tiếp tục (--resume) sau khi tiến trình bị dừng giữa chừng
+"""
+import glob
+import json
+import os
+import shutil
+import subprocess
+
+STATE_FILE = "checkpoint.json"
+LOG_FILE = "detections.jsonl"
+
+class VideoCheckpoint:
+    """Quản lý thư mục checkpoint: các segment video, log nhận diện và file trạng thái"""
+    def __init__(self, directory):
+        self.directory = directory
+        self.state_path = os.path.join(directory, STATE_FILE)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+    def segment_path(self, index):
+        return os.path.join(self.directory, f"segment_{index:05d}.mp4")
+
+    def load(self):
+        """
+        Đọc trạng thái checkpoint gần nhất, trả về None nếu chưa có
+        """
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def save(self, state):
+        """
+        Ghi trạng thái một cách nguyên tử (ghi file tạm rồi os.replace)
+        """
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def open_log(self, offset=0):
+        """
+        Mở log nhận diện để ghi tiếp, bỏ phần được ghi sau checkpoint cuối cùng
+        """
+        # Không dùng chế độ "ab": sau truncate, tell() vẫn trả về vị trí cuối file cũ cho tới
+        # lần ghi đầu tiên, và checkpoint lưu ngay lúc đó sẽ ghi lại offset sai
+        log = open(self.log_path, "r+b" if os.path.exists(self.log_path) else "wb")
+        log.truncate(offset)
+        log.seek(offset)
+        return log
+
+    def discard_segments_from(self, index):
+        """
+        Xoá các segment có chỉ số >= index (segment dở dang khi tiến trình bị dừng)
+        """
+        for path in glob.glob(os.path.join(self.directory, "segment_*.mp4")):
+            if int(os.path.basename(path)[8:13]) >= index:
+                os.remove(path)
+
+    def concatenate(self, num_segments, output_path, fps):
+        """
+        Ghép các segment thành video output (dùng ffmpeg nếu có, nếu không thì ghi lại bằng OpenCV)
+        """
+        segments = [self.segment_path(i) for i in range(num_segments)
+                    if os.path.exists(self.segment_path(i))]
+        if not segments:
+            return
+
+        if shutil.which("ffmpeg"):
+            list_path = os.path.join(self.directory, "segments.txt")
+            with open(list_path, "w") as f:
+                for path in segments:
+                    f.write(f"file '{os.path.abspath(path)}'\n")
+            subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                "-i", list_path, "-c", "copy", output_path], check=True)
+            return
+
+        import cv2
+        writer = None
+        for path in segments:
+            vs = cv2.VideoCapture(path)
+            while True:
+                (grabbed, frame) = vs.read()
+                if not grabbed:
+                    break
+                if writer is None:
+                    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+                    writer = cv2.VideoWriter(output_path, fourcc, fps,
+                        (frame.shape[1], frame.shape[0]), True)
+                writer.write(frame)
+            vs.release()
+        if writer is not None:
+            writer.release()
+
+    def move_log(self, path):
+        if os.path.exists(self.log_path):
+            shutil.move(self.log_path, path)
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class SegmentedWriter:
+    """
+    VideoWriter ghi output thành từng segment; mỗi lần checkpoint segment hiện tại được
+    đóng lại (file mp4 hoàn chỉnh) và frame tiếp theo sẽ mở segment mới
+    """
+    def __init__(self, checkpoint, fps, segment_index=0):
+        self.checkpoint = checkpoint
+        self.fps = fps
+        self.segment_index = segment_index
+        self.writer = None
+
+    def write(self, frame):
+        if self.writer is None:
+            import cv2
+            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+            self.writer = cv2.VideoWriter(self.checkpoint.segment_path(self.segment_index),
+                fourcc, self.fps, (frame.shape[1], frame.shape[0]), True)
+        self.writer.write(frame)
+
+    def close_segment(self):
+        """
+        Đóng segment đang ghi, trả về số segment đã hoàn tất
+        """
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+            self.segment_index += 1
+        return self.segment_index
+
+    def release(self):
+        return self.close_segment()
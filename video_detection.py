@@ -2,10 +2,14 @@
 Chương trình nhận diện đối tượng từ video sử dụng YOLOv3
 """
 import argparse
+import json
+import os
+import signal
+import sys
 import time
-import cv2
-from config import CONFIG_PATH, WEIGHTS_PATH, DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD
-from detection_utils import load_yolo_model, detect_objects_yolo, draw_predictions
+from config import (DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD, DEFAULT_MODEL, DEFAULT_CHECKPOINT_EVERY,
+    ADAPTIVE_INPUT_SIZES)
+from detectors import DETECTORS, create_detector
 
 def main():
     # Xử lý tham số dòng lệnh
@@ -22,10 +26,52 @@ def main():
         help="FPS of output video")
     ap.add_argument("-s", "--skip-frames", type=int, default=0,
         help="number of frames to skip between detections (to speed up processing)")
+    ap.add_argument("-m", "--model", type=str, default=DEFAULT_MODEL,
+        choices=sorted(DETECTORS), help="detection model to use")
+    ap.add_argument("--roi", type=str,
+        help="path to ROI JSON file (polygons and optional classes), yolo models only")
+    ap.add_argument("--classes", type=str,
+        help="comma-separated class names or ids to detect, e.g. person,car (yolo models only)")
+    ap.add_argument("--crop-roi", action="store_true",
+        help="run inference only on the bounding rect of the ROI polygons")
+    ap.add_argument("--checkpoint-every", type=int, default=0,
+        help="save a resumable checkpoint every N frames (0 disables checkpointing)")
+    ap.add_argument("--checkpoint-dir", type=str,
+        help="directory for checkpoint state and output segments (default: <output>.checkpoint)")
+    ap.add_argument("--resume", action="store_true",
+        help="continue from the last checkpoint of an interrupted run")
+    ap.add_argument("--adaptive", action="store_true",
+        help="adjust the detection interval and input size on the fly (replaces --skip-frames)")
+    ap.add_argument("--target-fps", type=float,
+        help="processing FPS the adaptive controller aims for (default: source FPS x --realtime-factor)")
+    ap.add_argument("--realtime-factor", type=float, default=1.0,
+        help="target speed relative to the source video when --target-fps is not given")
+    ap.add_argument("--decision-log", type=str,
+        help="path to a JSONL file recording every adaptive controller decision")
+    ap.add_argument("--events", type=str,
+        help="path to a JSONL file of per-object enter/exit events (instead of per-frame records)")
     args = vars(ap.parse_args())
+    if (args["roi"] or args["classes"]) and not args["model"].startswith("yolo"):
+        ap.error("--roi/--classes are only supported with the yolo models")
+    if args["adaptive"] and args["skip_frames"]:
+        ap.error("--skip-frames cannot be combined with --adaptive, which chooses the interval itself")
+
+    # Import thư viện nặng sau khi parse tham số để `--help` khởi động nhanh
+    import cv2
+    from detection_utils import draw_predictions
+    from roi_filter import load_roi_filter
 
     # Tải model
-    net, ln = load_yolo_model(CONFIG_PATH, WEIGHTS_PATH)
+    detector_kwargs = {}
+    roi_filter = load_roi_filter(args["roi"], args["classes"], args["crop_roi"])
+    if roi_filter is not None:
+        detector_kwargs["roi_filter"] = roi_filter
+    detector = create_detector(
+        args["model"],
+        confidence_threshold=args["confidence"],
+        nms_threshold=args["threshold"],
+        **detector_kwargs
+    )
     
     # Khởi tạo video capture
     print("[INFO] opening video file...")
@@ -39,13 +85,113 @@ def main():
         print("[INFO] could not determine # of frames in video")
         total_frames = -1
     
+    # Khởi tạo bộ điều khiển bỏ qua frame thích ứng
+    controller = None
+    if args["adaptive"]:
+        from adaptive_skip import AdaptiveSkipController
+        
+        target_fps = args["target_fps"]
+        if target_fps is None:
+            target_fps = (vs.get(cv2.CAP_PROP_FPS) or args["fps"]) * args["realtime_factor"]
+        input_sizes = None
+        if hasattr(detector, "input_size"):
+            input_sizes = [s for s in ADAPTIVE_INPUT_SIZES if s <= detector.input_size[0]]
+        controller = AdaptiveSkipController(target_fps, input_sizes, log_path=args["decision_log"])
+        print(f"[INFO] adaptive frame skipping enabled, target {target_fps:.2f} FPS")
+    
+    # Gộp kết quả theo thời gian thành sự kiện theo từng đối tượng
+    tracker = None
+    if args["events"]:
+        from events import EventTracker, EventWriter
+        tracker = EventTracker()
+        source_fps = vs.get(cv2.CAP_PROP_FPS) or args["fps"]
+    
     # Khởi tạo các biến
     writer = None
     (W, H) = (None, None)
     frame_count = 0
+    estimated = False
+    
+    # Khởi tạo checkpoint: output được ghi thành các segment trong thư mục checkpoint
+    checkpoint = None
+    state = None
+    if args["checkpoint_every"] > 0 or args["resume"]:
+        from video_checkpoint import VideoCheckpoint, SegmentedWriter
+        
+        checkpoint = VideoCheckpoint(args["checkpoint_dir"] or args["output"] + ".checkpoint")
+        state = checkpoint.load() if args["resume"] else None
+        segments, log_offset = 0, 0
+        if state is not None:
+            if state["input"] != os.path.abspath(args["input"]):
+                print(f"[ERROR] checkpoint belongs to a different input: {state['input']}")
+                return
+            frame_count, segments, log_offset = state["frame_index"], state["segments"], state["log_offset"]
+            if args["checkpoint_every"] <= 0:
+                args["checkpoint_every"] = state["checkpoint_every"]
+            print(f"[INFO] resuming from frame {frame_count} ({segments} segments done)")
+        elif args["resume"]:
+            print("[INFO] no checkpoint found, starting from the beginning")
+        if args["checkpoint_every"] <= 0:
+            args["checkpoint_every"] = DEFAULT_CHECKPOINT_EVERY
+        
+        checkpoint.discard_segments_from(segments)
+        log = checkpoint.open_log(log_offset)
+        writer = SegmentedWriter(checkpoint, args["fps"], segments)
+        
+        # Di chuyển tới frame đã xử lý cuối cùng; nếu backend không seek chính xác thì đọc bỏ qua
+        if frame_count > 0:
+            vs.set(cv2.CAP_PROP_POS_FRAMES, frame_count)
+            if int(vs.get(cv2.CAP_PROP_POS_FRAMES)) != frame_count:
+                vs.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                for _ in range(frame_count):
+                    vs.grab()
+        
+        # Khi bị dừng (SIGTERM/SIGINT), lưu checkpoint trước khi thoát
+        stop = {"requested": False}
+        def request_stop(signum, _frame):
+            stop["requested"] = True
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+    last_checkpoint = frame_count
+    
+    # Khi tiếp tục từ checkpoint: khôi phục các track đang mở và cắt file sự kiện về offset đã lưu
+    if tracker is not None:
+        events_offset = None
+        if state is not None:
+            if "events" in state:
+                tracker.restore(state["events"]["tracker"])
+                events_offset = state["events"]["offset"]
+            else:
+                print("[WARNING] checkpoint has no event state, events before the checkpoint are not in the events file")
+        event_writer = EventWriter(args["events"], events_offset)
     
     # Vòng lặp qua các frame trong video
     while True:
+        # Lưu checkpoint định kỳ: đóng segment hiện tại, flush log rồi ghi trạng thái
+        if checkpoint is not None and (frame_count - last_checkpoint >= args["checkpoint_every"]
+                                       or stop["requested"]):
+            segments = writer.close_segment()
+            log.flush()
+            os.fsync(log.fileno())
+            state = {
+                "input": os.path.abspath(args["input"]),
+                "frame_index": frame_count,
+                "segments": segments,
+                "log_offset": log.tell(),
+                "checkpoint_every": args["checkpoint_every"],
+            }
+            if tracker is not None:
+                state["events"] = {"offset": event_writer.sync(), "tracker": tracker.state()}
+            checkpoint.save(state)
+            last_checkpoint = frame_count
+            if stop["requested"]:
+                log.close()
+                if tracker is not None:
+                    event_writer.close()
+                vs.release()
+                print(f"[INFO] stopped at frame {frame_count}, rerun with --resume to continue")
+                sys.exit(1)
+        
         # Đọc frame tiếp theo
         (grabbed, frame) = vs.read()
         
@@ -59,21 +205,38 @@ def main():
         
         # Bỏ qua frame nếu cần (để tăng tốc độ xử lý)
         frame_count += 1
-        if args["skip_frames"] > 0 and frame_count % (args["skip_frames"] + 1) != 0:
+        if controller is not None:
+            skip = not controller.should_detect(frame_count)
+        else:
+            skip = args["skip_frames"] > 0 and frame_count % (args["skip_frames"] + 1) != 0
+        if skip:
             # Vẫn ghi frame này vào video output nhưng không thực hiện nhận diện
             if writer is not None:
                 writer.write(frame)
+            if controller is not None:
+                controller.frame_done()
             continue
         
         # Thực hiện nhận diện đối tượng
         start = time.time()
-        results = detect_objects_yolo(
-            net, ln, frame, 
-            confidence_threshold=args["confidence"], 
-            nms_threshold=args["threshold"]
-        )
+        results = detector.detect(frame)
         end = time.time()
         
+        # Chỉ ghi sự kiện khi trạng thái đối tượng thay đổi (timestamp theo thời gian trong video)
+        if tracker is not None:
+            event_writer.write(tracker.update(results, frame_count / source_fps))
+        
+        # Cập nhật bộ điều khiển thích ứng (trước khi vẽ lên frame)
+        if controller is not None:
+            controller.update(frame_count, frame, end - start, len(results))
+            if controller.input_size is not None:
+                detector.input_size = (controller.input_size, controller.input_size)
+        
+        # Ghi log nhận diện (chỉ khi có checkpoint)
+        if checkpoint is not None:
+            record = {"frame": frame_count, "objects": results}
+            log.write((json.dumps(record, default=lambda o: o.item()) + "\n").encode("utf-8"))
+        
         # Vẽ kết quả nhận diện lên frame
         output_frame = draw_predictions(frame, results)
         
@@ -83,13 +246,21 @@ def main():
             fourcc = cv2.VideoWriter_fourcc(*"mp4v")
             writer = cv2.VideoWriter(args["output"], fourcc, args["fps"],
                 (frame.shape[1], frame.shape[0]), True)
-                
+        
+        if not estimated:
+            estimated = True
             # Hiển thị thông tin xử lý
             if total_frames > 0:
                 elap = (end - start)
                 print(f"[INFO] single frame took {elap:.4f} seconds")
-                estimated_time = elap * total_frames / (args["skip_frames"] + 1)
-                print(f"[INFO] estimated total time to finish: {estimated_time:.4f} seconds")
+                if controller is not None:
+                    # Interval của controller thay đổi trong lúc chạy nên đây chỉ là ước lượng ban đầu
+                    estimated_time = elap * total_frames / controller.interval
+                    print(f"[INFO] estimated total time to finish: {estimated_time:.4f} seconds "
+                          f"(at the current interval of {controller.interval} frames)")
+                else:
+                    estimated_time = elap * total_frames / (args["skip_frames"] + 1)
+                    print(f"[INFO] estimated total time to finish: {estimated_time:.4f} seconds")
         
         # Ghi frame vào video output
         writer.write(output_frame)
@@ -98,12 +269,34 @@ def main():
         if total_frames > 0 and frame_count % 100 == 0:
             percent_complete = frame_count / total_frames * 100
             print(f"[INFO] Processing: {percent_complete:.2f}% complete")
+        
+        if controller is not None:
+            controller.frame_done(end - start)
     
     # Dọn dẹp
     print("[INFO] cleaning up...")
     if writer is not None:
-        writer.release()
+        segments = writer.release()
     vs.release()
+    if tracker is not None:
+        event_writer.write(tracker.flush(frame_count / source_fps))
+        event_writer.close()
+        tracker.report()
+        print(f"[INFO] Events saved to {args['events']}")
+    if controller is not None:
+        controller.close()
+        print(f"[INFO] adaptive controller made {controller.decisions} decisions")
+    
+    # Ghép các segment thành video output cuối cùng
+    if checkpoint is not None:
+        log.close()
+        print(f"[INFO] concatenating {segments} segments...")
+        checkpoint.concatenate(segments, args["output"], args["fps"])
+        log_path = os.path.splitext(args["output"])[0] + "_detections.jsonl"
+        checkpoint.move_log(log_path)
+        checkpoint.remove()
+        print(f"[INFO] Detections log saved to {log_path}")
+    detector.report()
     print(f"[INFO] Output saved to {args['output']}")
 
 if __name__ == "__main__":